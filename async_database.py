@@ -0,0 +1,47 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """Awaitable facade over a Database
+    
+    Every storage method of the wrapped database is exposed as a coroutine
+    that runs on a small thread pool, so disk I/O never blocks the Discord
+    event loop. Attributes that are not methods are passed through.
+    """
+    
+    def __init__(self, db, max_workers=4):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database")
+    
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the storage executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+    
+    async def run_transaction(self, func, *args, **kwargs):
+        """Run func(db, *args, **kwargs) inside a single database transaction"""
+        def work():
+            with self.db.transaction():
+                return func(self.db, *args, **kwargs)
+        return await self.run(work)
+    
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, method)
+        return method
+    
+    def shutdown(self):
+        """Wait for pending storage calls and stop the executor"""
+        self.executor.shutdown(wait=True)
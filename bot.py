@@ -5,11 +5,15 @@ Enhanced bot with comprehensive tournament management and duel scheduling
 
 import os
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from database import Database
+from datetime import datetime
+from database import create_database
+from async_database import AsyncDatabase
+from utils.announcements import ChannelAnnouncer
+from utils.dm_queue import DMDeliveryQueue
+from utils.name_resolver import DisplayNameResolver
 from utils.scheduler import MatchScheduler
 
 # Configure logging
@@ -30,7 +34,11 @@ class DuelLordsBot(commands.Bot):
         )
         
         # Initialize database
-        self.db = Database()
+        self.db = create_database()
+        self.async_db = AsyncDatabase(self.db)
+        self.dm_queue = DMDeliveryQueue(self)
+        self.announcer = ChannelAnnouncer(self)
+        self.name_resolver = DisplayNameResolver(self)
         
         # Initialize scheduler 
         self.scheduler = None
@@ -39,8 +47,12 @@ class DuelLordsBot(commands.Bot):
         """Load all cogs when bot starts"""
         try:
             # Initialize scheduler now that we have an event loop
-            from utils.scheduler import MatchScheduler
-            self.scheduler = MatchScheduler(self)
+            self.scheduler = MatchScheduler(
+                self, on_reminder=self.send_duel_reminder, on_start=self.start_duel,
+                claim=self.async_db.claim_match_job
+            )
+            self.scheduler.watch(self.db)
+            self.scheduler.load_matches(await self.async_db.get_upcoming_matches())
             
             # Load command cogs
             await self.load_extension('commands.admin_commands')
@@ -52,10 +64,6 @@ class DuelLordsBot(commands.Bot):
             
             print("✅ All cogs loaded successfully")
             
-            # Start background tasks
-            if not self.duel_reminder_task.is_running():
-                self.duel_reminder_task.start()
-            
             # Sync slash commands
             synced = await self.tree.sync()
             print(f"✅ Synced {len(synced)} slash commands")
@@ -94,31 +102,6 @@ class DuelLordsBot(commands.Bot):
         print(f"❌ Command error: {error}")
         logger.error(f"Command error: {error}")
     
-    @tasks.loop(minutes=1)
-    async def duel_reminder_task(self):
-        """Check for upcoming duels and send reminders"""
-        try:
-            matches = self.db.get_upcoming_matches()
-            current_time = datetime.now()
-            
-            for match in matches:
-                match_time = datetime.fromisoformat(match['scheduled_time'])
-                time_diff = match_time - current_time
-                
-                # Send reminder 5 minutes before
-                if timedelta(minutes=4, seconds=30) <= time_diff <= timedelta(minutes=5, seconds=30):
-                    if not match.get('reminder_sent', False):
-                        await self.send_duel_reminder(match)
-                        # Update reminder status
-                        self.db.update_match_reminder_status(match['id'], True)
-                
-                # Start the duel if time has come
-                elif time_diff.total_seconds() <= 0 and match['status'] == 'scheduled':
-                    await self.start_duel(match)
-                    
-        except Exception as e:
-            logger.error(f"Error in duel reminder task: {e}")
-    
     async def send_duel_reminder(self, match):
         """Send duel reminder to both players"""
         try:
@@ -127,33 +110,14 @@ class DuelLordsBot(commands.Bot):
             player1_id = int(match['player1_id'])
             player2_id = int(match['player2_id'])
             
-            player1 = await self.fetch_user(player1_id)
-            player2 = await self.fetch_user(player2_id)
-            
             embed = create_duel_reminder_embed(match)
             
-            # Send DM to both players
-            try:
-                await player1.send(embed=embed)
-                print(f"✅ Reminder sent to {player1.name}")
-            except:
-                print(f"❌ Failed to send reminder to {player1.name}")
+            # Queue DMs to both players
+            for player_id in (player1_id, player2_id):
+                await self.dm_queue.send(player_id, label="duel reminder", embed=embed)
             
-            try:
-                await player2.send(embed=embed)
-                print(f"✅ Reminder sent to {player2.name}")
-            except:
-                print(f"❌ Failed to send reminder to {player2.name}")
-            
-            # Also send to channel if specified
-            if match.get('channel_id'):
-                try:
-                    channel = self.get_channel(int(match['channel_id']))
-                    if channel and hasattr(channel, 'send') and callable(getattr(channel, 'send', None)):
-                        content = f"⚔️ Duel Reminder!\n<@{player1_id}> vs <@{player2_id}>"
-                        await channel.send(content=content, embed=embed)
-                except:
-                    pass
+            # Also announce in the match channel, batched per minute
+            self.announcer.announce('reminder', match)
                     
         except Exception as e:
             logger.error(f"Error sending duel reminder: {e}")
@@ -161,34 +125,15 @@ class DuelLordsBot(commands.Bot):
     async def start_duel(self, match):
         """Start the duel and notify players"""
         try:
-            from utils.embeds import create_duel_start_embed
-            
             # Update match status
-            self.db.update_match_status(match['id'], 'active')
+            await self.async_db.update_match_status(match['id'], 'active')
             
-            player1_id = int(match['player1_id'])
-            player2_id = int(match['player2_id'])
-            
-            embed = create_duel_start_embed(match)
-            
-            # Send to channel
-            if match.get('channel_id'):
-                try:
-                    channel = self.get_channel(int(match['channel_id']))
-                    if channel and hasattr(channel, 'send') and callable(getattr(channel, 'send', None)):
-                        content = f"🚀 Duel Starting Now!\n<@{player1_id}> vs <@{player2_id}>"
-                        await channel.send(content=content, embed=embed)
-                except:
-                    pass
+            # Announce in the match channel, batched per minute
+            self.announcer.announce('start', match)
                     
         except Exception as e:
             logger.error(f"Error starting duel: {e}")
     
-    @duel_reminder_task.before_loop
-    async def before_duel_reminder_task(self):
-        """Wait until bot is ready before starting reminder task"""
-        await self.wait_until_ready()
-
 def run_bot():
     """Run the Discord bot"""
     import asyncio
@@ -5,11 +5,17 @@ Enhanced bot with comprehensive tournament management
 
 import os
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from database import Database
+from datetime import datetime
+from database import create_database
+from async_database import AsyncDatabase
+from utils.announcements import ChannelAnnouncer
+from utils.dm_queue import DMDeliveryQueue
+from utils.embeds import render_duel_embed
+from utils.name_resolver import DisplayNameResolver
+from utils.scheduler import MatchScheduler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,7 +35,12 @@ class TournamentBot(commands.Bot):
         )
         
         # Initialize database
-        self.db = Database()
+        self.db = create_database()
+        self.async_db = AsyncDatabase(self.db)
+        self.dm_queue = DMDeliveryQueue(self)
+        self.announcer = ChannelAnnouncer(self, locale='en', brand="BombSquad Tournaments")
+        self.name_resolver = DisplayNameResolver(self)
+        self.scheduler = None
         
     async def setup_hook(self):
         """Load all cogs when bot starts"""
@@ -43,8 +54,13 @@ class TournamentBot(commands.Bot):
             
             print("✅ All cogs loaded successfully")
             
-            # Start background tasks
-            self.match_reminder_task.start()
+            # Arm reminder and start timers for the stored matches
+            self.scheduler = MatchScheduler(
+                self, on_reminder=self.send_match_reminder, on_start=self.start_match,
+                claim=self.async_db.claim_match_job
+            )
+            self.scheduler.watch(self.db)
+            self.scheduler.load_matches(await self.async_db.get_upcoming_matches())
             
             # Sync slash commands
             synced = await self.tree.sync()
@@ -84,65 +100,18 @@ class TournamentBot(commands.Bot):
         print(f"❌ Command error: {error}")
         logger.error(f"Command error: {error}")
     
-    @tasks.loop(minutes=1)
-    async def match_reminder_task(self):
-        """Check for upcoming matches and send reminders"""
-        try:
-            matches = self.db.get_upcoming_matches()
-            current_time = datetime.now()
-            
-            for match in matches:
-                match_time = datetime.fromisoformat(match['scheduled_time'])
-                time_diff = match_time - current_time
-                
-                # Send reminder 5 minutes before
-                if timedelta(minutes=4, seconds=30) <= time_diff <= timedelta(minutes=5, seconds=30):
-                    if not match.get('reminder_sent', False):
-                        await self.send_match_reminder(match)
-                        self.db.update_match_reminder_status(match['id'], True)
-                
-                # Start the match if time has come
-                elif time_diff.total_seconds() <= 0 and match['status'] == 'scheduled':
-                    await self.start_match(match)
-                    
-        except Exception as e:
-            logger.error(f"Error in match reminder task: {e}")
-    
-    @match_reminder_task.before_loop
-    async def before_match_reminder_task(self):
-        """Wait until bot is ready before starting reminder task"""
-        await self.wait_until_ready()
-    
     async def send_match_reminder(self, match):
         """Send match reminder to both players"""
         try:
             player1_id = int(match['player1_id'])
             player2_id = int(match['player2_id'])
             
-            embed = discord.Embed(
-                title="🔔 Match Reminder",
-                description=f"Your match is starting in 5 minutes!",
-                color=discord.Color.orange()
-            )
-            
-            embed.add_field(name="Match ID", value=match['id'], inline=True)
-            embed.add_field(name="Server", value="18.228.228.44:3827", inline=True)
-            embed.add_field(name="Time", value=match['scheduled_time'], inline=False)
-            
-            # Send DM to both players
-            try:
-                player1 = await self.fetch_user(player1_id)
-                await player1.send(embed=embed)
-                print(f"✅ Reminder sent to {player1.name}")
-            except:
-                pass
+            # Same cached template and wording as the channel announcements
+            embed = render_duel_embed('reminder', match, self.announcer.locale, self.announcer.brand)
             
-            try:
-                player2 = await self.fetch_user(player2_id)
-                await player2.send(embed=embed)
-                print(f"✅ Reminder sent to {player2.name}")
-            except:
-                pass
+            # Queue DMs to both players
+            for player_id in (player1_id, player2_id):
+                await self.dm_queue.send(player_id, label="match reminder", embed=embed)
                     
         except Exception as e:
             logger.error(f"Error sending match reminder: {e}")
@@ -151,29 +120,10 @@ class TournamentBot(commands.Bot):
         """Start the match and notify players"""
         try:
             # Update match status
-            self.db.update_match_status(match['id'], 'active')
-            
-            player1_id = int(match['player1_id'])
-            player2_id = int(match['player2_id'])
-            
-            embed = discord.Embed(
-                title="🚀 Match Starting Now!",
-                description=f"Join the BombSquad server to compete!",
-                color=discord.Color.green()
-            )
-            
-            embed.add_field(name="Match ID", value=match['id'], inline=True)
-            embed.add_field(name="Server", value="18.228.228.44:3827", inline=True)
-            embed.add_field(name="Players", value=f"<@{player1_id}> vs <@{player2_id}>", inline=False)
+            await self.async_db.update_match_status(match['id'], 'active')
             
-            # Send to channel if available
-            if match.get('channel_id'):
-                try:
-                    channel = self.get_channel(int(match['channel_id']))
-                    if channel:
-                        await channel.send(embed=embed)
-                except:
-                    pass
+            # Announce in the match channel, batched per minute
+            self.announcer.announce('start', match)
                     
         except Exception as e:
             logger.error(f"Error starting match: {e}")
@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 class AdminCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
 
     def is_admin(self, interaction: discord.Interaction) -> bool:
         """Check if user has admin permissions"""
@@ -65,14 +65,14 @@ class AdminCommands(commands.Cog):
             player1_id = str(player1.id)
             player2_id = str(player2.id)
             
-            if not self.db.get_player(player1_id):
+            if not await self.db.get_player(player1_id):
                 await interaction.response.send_message(
                     f"❌ {player1.mention} is not registered. They need to use `/register` first.", 
                     ephemeral=True
                 )
                 return
             
-            if not self.db.get_player(player2_id):
+            if not await self.db.get_player(player2_id):
                 await interaction.response.send_message(
                     f"❌ {player2.mention} is not registered. They need to use `/register` first.", 
                     ephemeral=True
@@ -111,7 +111,7 @@ class AdminCommands(commands.Cog):
                         return
 
             # Create the match
-            match_id = self.db.create_match(
+            match_id = await self.db.create_match(
                 challenger_id=player1_id,
                 opponent_id=player2_id,
                 scheduled_time=match_date.isoformat(),
@@ -119,9 +119,9 @@ class AdminCommands(commands.Cog):
             )
 
             # Set match status to accepted since it's admin created
-            match_data = self.db.get_match(match_id)
+            match_data = await self.db.get_match(match_id)
             match_data['status'] = 'accepted'
-            self.db.update_match(match_id, match_data)
+            await self.db.update_match(match_id, match_data)
 
             # Create embed
             embed = discord.Embed(
@@ -255,7 +255,7 @@ class AdminCommands(commands.Cog):
 
         try:
             user_id = str(player.id)
-            player_data = self.db.get_player(user_id)
+            player_data = await self.db.get_player(user_id)
             
             if not player_data:
                 await interaction.response.send_message(
@@ -284,7 +284,7 @@ class AdminCommands(commands.Cog):
                 if player_data[stat] < 0:
                     player_data[stat] = 0
 
-            self.db.update_player(user_id, player_data)
+            await self.db.update_player(user_id, player_data)
 
             # Create embed
             embed = discord.Embed(
@@ -340,7 +340,7 @@ class AdminCommands(commands.Cog):
 
         try:
             user_id = str(player.id)
-            player_data = self.db.get_player(user_id)
+            player_data = await self.db.get_player(user_id)
             
             if not player_data:
                 await interaction.response.send_message(
@@ -356,7 +356,7 @@ class AdminCommands(commands.Cog):
             player_data['kills'] = 0
             player_data['deaths'] = 0
 
-            self.db.update_player(user_id, player_data)
+            await self.db.update_player(user_id, player_data)
 
             embed = discord.Embed(
                 title="🔄 Player Stats Reset",
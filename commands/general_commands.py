@@ -11,7 +11,7 @@ from datetime import datetime
 class GeneralCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
 
     @app_commands.command(name="ip", description="Show BombSquad server information")
     async def server_ip(self, interaction: discord.Interaction):
@@ -133,9 +133,9 @@ class GeneralCommands(commands.Cog):
     async def about_bot(self, interaction: discord.Interaction):
         """Show information about the bot"""
         # Get statistics
-        total_players = len(self.db.get_all_players())
-        total_matches = len(self.db.get_all_matches())
-        active_matches = len([m for m in self.db.get_all_matches().values() if m.get('status') == 'scheduled'])
+        total_players = len(await self.db.get_all_players())
+        total_matches = len(await self.db.get_all_matches())
+        active_matches = (await self.db.get_match_status_counts()).get('scheduled', 0)
         
         embed = discord.Embed(
             title="🤖 About DUEL LORDS",
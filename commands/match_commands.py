@@ -13,7 +13,8 @@ import uuid
 class MatchCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
+        self.names = bot.name_resolver
 
     @app_commands.command(name="duel", description="Challenge players to a duel - /duel @player1 @player2 hour minute")
     @app_commands.describe(
@@ -48,8 +49,8 @@ class MatchCommands(commands.Cog):
             return
 
         # Check if both players are registered
-        player1_data = self.db.get_player(str(player1.id))
-        player2_data = self.db.get_player(str(player2.id))
+        player1_data = await self.db.get_player(str(player1.id))
+        player2_data = await self.db.get_player(str(player2.id))
 
         if not player1_data:
             await interaction.response.send_message(
@@ -96,7 +97,7 @@ class MatchCommands(commands.Cog):
         }
 
         # Save to database
-        self.db.create_match(
+        await self.db.create_match(
             challenger_id=str(player1.id),
             opponent_id=str(player2.id),
             scheduled_time=scheduled_time.isoformat(),
@@ -211,7 +212,7 @@ class MatchCommands(commands.Cog):
         """Record match result and update player statistics"""
         
         # Get match data
-        match = self.db.get_match(match_id)
+        match = await self.db.get_match(match_id)
         if not match:
             await interaction.response.send_message(
                 f"❌ Match with ID `{match_id}` not found",
@@ -235,11 +236,14 @@ class MatchCommands(commands.Cog):
         match['winner_kills'] = winner_kills
         match['loser_kills'] = loser_kills
         
-        self.db.update_match(match_id, match)
+        # Save the match, both players' statistics and ratings in one write
+        def apply_result(db):
+            db.update_match(match_id, match)
+            db.update_player_stats(str(winner.id), wins=1, kills=winner_kills)
+            db.update_player_stats(str(loser.id), losses=1, kills=loser_kills)
+            db.update_ratings(str(winner.id), str(loser.id), 1.0)
         
-        # Update player statistics
-        self.db.update_player_stats(str(winner.id), wins=1, kills=winner_kills)
-        self.db.update_player_stats(str(loser.id), losses=1, kills=loser_kills)
+        await self.db.run_transaction(apply_result)
         
         # Create result embed
         embed = discord.Embed(
@@ -273,9 +277,10 @@ class MatchCommands(commands.Cog):
     @app_commands.command(name="matches", description="Show scheduled matches")
     async def show_matches(self, interaction: discord.Interaction):
         """Show all scheduled matches"""
-        matches = self.db.get_all_matches()
+        # Filter active matches
+        active_matches = await self.db.get_upcoming_matches() + await self.db.get_matches_by_status('accepted')
         
-        if not matches:
+        if not active_matches:
             embed = discord.Embed(
                 title="📅 No Matches Scheduled",
                 description="No matches are currently scheduled",
@@ -289,9 +294,6 @@ class MatchCommands(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
         
-        # Filter active matches
-        active_matches = [m for m in matches.values() if m['status'] in ['scheduled', 'accepted']]
-        
         embed = discord.Embed(
             title="📅 Scheduled Matches",
             description=f"Total: {len(active_matches)} active matches",
@@ -299,17 +301,22 @@ class MatchCommands(commands.Cog):
             timestamp=datetime.now()
         )
         
-        for match in active_matches[:10]:  # Show first 10
+        shown_matches = active_matches[:10]  # Show first 10
+        players = await self.db.get_all_players()
+        names = await self.names.resolve(
+            [m[key] for m in shown_matches for key in ('player1_id', 'player2_id') if m.get(key)],
+            guild=interaction.guild,
+            fallbacks={user_id: player.get('name') for user_id, player in players.items()}
+        )
+        
+        for match in shown_matches:
             try:
-                player1 = await interaction.client.fetch_user(int(match['player1_id']))
-                player2 = await interaction.client.fetch_user(int(match['player2_id']))
-                
                 scheduled_time = datetime.fromisoformat(match['scheduled_time'])
                 time_str = f"<t:{int(scheduled_time.timestamp())}:R>"
                 
                 embed.add_field(
                     name=f"Match {match['id']}",
-                    value=f"{player1.display_name} vs {player2.display_name}\n🕐 {time_str}",
+                    value=f"{names[match['player1_id']]} vs {names[match['player2_id']]}\n🕐 {time_str}",
                     inline=True
                 )
             except:
@@ -329,7 +336,7 @@ class MatchCommands(commands.Cog):
     @app_commands.describe(match_id="Match ID to cancel")
     async def cancel_match(self, interaction: discord.Interaction, match_id: str):
         """Cancel a scheduled match"""
-        match = self.db.get_match(match_id)
+        match = await self.db.get_match(match_id)
         
         if not match:
             await interaction.response.send_message(
@@ -363,7 +370,7 @@ class MatchCommands(commands.Cog):
         match['cancelled_at'] = datetime.now().isoformat()
         match['cancelled_by'] = user_id
         
-        self.db.update_match(match_id, match)
+        await self.db.update_match(match_id, match)
         
         embed = discord.Embed(
             title="❌ Match Cancelled",
@@ -372,17 +379,12 @@ class MatchCommands(commands.Cog):
             timestamp=datetime.now()
         )
         
-        try:
-            player1 = await interaction.client.fetch_user(int(match['player1_id']))
-            player2 = await interaction.client.fetch_user(int(match['player2_id']))
-            
-            embed.add_field(
-                name="🥊 Match",
-                value=f"{player1.display_name} vs {player2.display_name}",
-                inline=False
-            )
-        except:
-            pass
+        names = await self.names.resolve([match['player1_id'], match['player2_id']], guild=interaction.guild)
+        embed.add_field(
+            name="🥊 Match",
+            value=f"{names[match['player1_id']]} vs {names[match['player2_id']]}",
+            inline=False
+        )
         
         embed.add_field(
             name="🗑️ Cancelled by",
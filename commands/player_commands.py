@@ -7,11 +7,12 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
+from utils.ratings import DEFAULT_RATING
 
 class PlayerCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
 
     @app_commands.command(name="register", description="Register a new player for the tournament")
     @app_commands.describe(name="Player name (optional - Discord name will be used if not specified)")
@@ -21,7 +22,7 @@ class PlayerCommands(commands.Cog):
         player_name = name or user.display_name
         
         # Check if already registered
-        if self.db.get_player(str(user.id)):
+        if await self.db.get_player(str(user.id)):
             embed = discord.Embed(
                 title="❌ Already Registered",
                 description=f"You are already registered for the tournament, **{player_name}**!",
@@ -36,7 +37,7 @@ class PlayerCommands(commands.Cog):
             return
 
         # Register the player
-        success = self.db.register_player(str(user.id), player_name)
+        success = await self.db.register_player(str(user.id), player_name)
         
         if success:
             embed = discord.Embed(
@@ -87,7 +88,7 @@ class PlayerCommands(commands.Cog):
     async def player_stats(self, interaction: discord.Interaction, player: discord.Member | None = None):
         """Show player statistics"""
         target_user = player or interaction.user
-        player_data = self.db.get_player(str(target_user.id))
+        player_data = await self.db.get_player(str(target_user.id))
         
         if not player_data:
             embed = discord.Embed(
@@ -116,6 +117,7 @@ class PlayerCommands(commands.Cog):
         
         # Determine rank
         rank = self.calculate_rank(player_data)
+        standing = await self.db.get_player_standing(str(target_user.id))
         
         embed = discord.Embed(
             title="👑 ملف اللاعب",
@@ -177,6 +179,32 @@ class PlayerCommands(commands.Cog):
             inline=True
         )
         
+        embed.add_field(
+            name="♟️ التقييم",
+            value=f"**{player_data.get('rating', DEFAULT_RATING):.0f}** Elo",
+            inline=True
+        )
+        
+        # Position in each leaderboard
+        if standing:
+            ranking_labels = {
+                'wins': "🏆 الانتصارات",
+                'kills': "⚔️ القتل",
+                'kd_ratio': "📊 نسبة K/D",
+                'win_rate': "📈 معدل الفوز",
+                'rating': "♟️ التقييم"
+            }
+            standing_text = "\n".join(
+                f"{label}: **#{standing[ranking]['rank']}** من {standing[ranking]['total']:,} "
+                f"(أفضل {standing[ranking]['top_percent']:.1f}%)"
+                for ranking, label in ranking_labels.items()
+            )
+            embed.add_field(
+                name="🌍 الترتيب العالمي",
+                value=standing_text,
+                inline=False
+            )
+        
         # Registration date
         reg_date = player_data.get('registered_at', datetime.now().isoformat())
         try:
@@ -199,9 +227,9 @@ class PlayerCommands(commands.Cog):
     @app_commands.command(name="players", description="عرض جميع اللاعبين المسجلين")
     async def list_players(self, interaction: discord.Interaction):
         """List all registered players"""
-        players = self.db.get_all_players()
+        player_count = await self.db.get_player_count()
         
-        if not players:
+        if not player_count:
             embed = discord.Embed(
                 title="📭 لا يوجد لاعبين",
                 description="لم يتم تسجيل أي لاعبين بعد.\nاستخدم `/register` للتسجيل",
@@ -210,18 +238,18 @@ class PlayerCommands(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
 
-        # Sort players by wins
-        sorted_players = sorted(players.items(), key=lambda x: x[1].get('wins', 0), reverse=True)
+        # Top 15 players by wins
+        sorted_players = [(player['user_id'], player) for player in await self.db.get_top_players('wins', 15)]
         
         embed = discord.Embed(
             title="👥 قائمة اللاعبين المسجلين",
-            description=f"إجمالي {len(players)} لاعب مسجل في البطولة",
+            description=f"إجمالي {player_count} لاعب مسجل في البطولة",
             color=0x7289DA,
             timestamp=datetime.now()
         )
         
         players_text = ""
-        for i, (player_id, player_data) in enumerate(sorted_players[:15], 1):  # Show top 15
+        for i, (player_id, player_data) in enumerate(sorted_players, 1):
             name = player_data.get('name', f'Player {player_id}')
             wins = player_data.get('wins', 0)
             losses = player_data.get('losses', 0)
@@ -244,7 +272,7 @@ class PlayerCommands(commands.Cog):
             inline=False
         )
         
-        embed.set_footer(text=f"إجمالي {len(players)} لاعب • عرض أفضل 15 لاعب")
+        embed.set_footer(text=f"إجمالي {player_count} لاعب • عرض أفضل 15 لاعب")
         
         await interaction.response.send_message(embed=embed)
 
@@ -257,16 +285,17 @@ class PlayerCommands(commands.Cog):
         app_commands.Choice(name="الانتصارات", value="wins"),
         app_commands.Choice(name="عدد القتل", value="kills"),
         app_commands.Choice(name="نسبة K/D", value="kd_ratio"),
-        app_commands.Choice(name="معدل الفوز", value="win_rate")
+        app_commands.Choice(name="معدل الفوز", value="win_rate"),
+        app_commands.Choice(name="التقييم", value="rating")
     ])
     async def top_fighters(self, interaction: discord.Interaction, category: str = "wins", limit: int = 10):
         """Show top fighters leaderboard"""
         if limit < 1 or limit > 25:
             limit = 10
         
-        players = self.db.get_all_players()
+        player_count = await self.db.get_player_count()
         
-        if not players:
+        if not player_count:
             embed = discord.Embed(
                 title="📭 لا يوجد مقاتلين",
                 description="لم يتم تسجيل أي لاعبين بعد",
@@ -275,34 +304,17 @@ class PlayerCommands(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
 
-        # Sort based on category
-        sorted_players = []
-        if category == "wins":
-            sorted_players = sorted(players.items(), key=lambda x: x[1].get('wins', 0), reverse=True)
-        elif category == "kills":
-            sorted_players = sorted(players.items(), key=lambda x: x[1].get('kills', 0), reverse=True)
-        elif category == "kd_ratio":
-            def get_kd_ratio(player_data):
-                kills = player_data.get('kills', 0)
-                deaths = player_data.get('deaths', 0)
-                return kills / deaths if deaths > 0 else kills
-            sorted_players = sorted(players.items(), key=lambda x: get_kd_ratio(x[1]), reverse=True)
-        elif category == "win_rate":
-            def get_win_rate(player_data):
-                wins = player_data.get('wins', 0)
-                losses = player_data.get('losses', 0)
-                draws = player_data.get('draws', 0)
-                total = wins + losses + draws
-                return wins / total if total > 0 else 0
-            sorted_players = sorted(players.items(), key=lambda x: get_win_rate(x[1]), reverse=True)
-        else:
-            sorted_players = sorted(players.items(), key=lambda x: x[1].get('wins', 0), reverse=True)
+        # Rankings are kept sorted by the storage layer
+        if category not in ("wins", "kills", "kd_ratio", "win_rate", "rating"):
+            category = "wins"
+        sorted_players = [(player['user_id'], player) for player in await self.db.get_top_players(category, limit)]
 
         category_names = {
             "wins": "Wins",
             "kills": "Kills",
             "kd_ratio": "K/D Ratio",
-            "win_rate": "Win Rate"
+            "win_rate": "Win Rate",
+            "rating": "Rating"
         }
 
         embed = discord.Embed(
@@ -313,7 +325,7 @@ class PlayerCommands(commands.Cog):
         )
 
         fighters_text = ""
-        for i, (player_id, player_data) in enumerate(sorted_players[:limit], 1):
+        for i, (player_id, player_data) in enumerate(sorted_players, 1):
             # Get rank emoji
             if i == 1:
                 rank_emoji = "🥇"
@@ -347,6 +359,8 @@ class PlayerCommands(commands.Cog):
                     value = f"{win_rate:.1f}% ({total} matches)"
                 else:
                     value = "0% (0 matches)"
+            elif category == "rating":
+                value = f"{player_data.get('rating', DEFAULT_RATING):.0f} Elo"
             else:
                 value = f"{player_data.get('wins', 0)} wins"
 
@@ -358,7 +372,7 @@ class PlayerCommands(commands.Cog):
             inline=False
         )
 
-        embed.set_footer(text=f"DUEL LORDS • Total: {len(players)} players")
+        embed.set_footer(text=f"DUEL LORDS • Total: {player_count} players")
 
         await interaction.response.send_message(embed=embed)
 
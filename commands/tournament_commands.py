@@ -11,7 +11,8 @@ logger = logging.getLogger(__name__)
 class TournamentCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
+        self.names = bot.name_resolver
 
     @app_commands.command(name="create_tournament", description="Create a new tournament")
     @app_commands.describe(
@@ -36,7 +37,7 @@ class TournamentCommands(commands.Cog):
             return
         
         try:
-            tournament_id = self.db.create_tournament(
+            tournament_id = await self.db.create_tournament(
                 name=name,
                 description=description,
                 max_players=max_players,
@@ -72,14 +73,14 @@ class TournamentCommands(commands.Cog):
         
         try:
             # Check if player is registered
-            if not self.db.get_player(user_id):
+            if not await self.db.get_player(user_id):
                 await interaction.response.send_message(
                     get_translation('player.must_register'), 
                     ephemeral=True
                 )
                 return
             
-            tournament = self.db.get_tournament(tournament_id)
+            tournament = await self.db.get_tournament(tournament_id)
             if not tournament:
                 await interaction.response.send_message(
                     get_translation('tournament.not_found'), 
@@ -110,7 +111,7 @@ class TournamentCommands(commands.Cog):
             
             # Add player to tournament
             tournament['participants'].append(user_id)
-            self.db.update_tournament(tournament_id, tournament)
+            await self.db.update_tournament(tournament_id, tournament)
             
             embed = discord.Embed(
                 title="✅ Tournament Joined",
@@ -138,7 +139,7 @@ class TournamentCommands(commands.Cog):
     async def tournament_info(self, interaction: discord.Interaction, tournament_id: str):
         """View tournament information"""
         try:
-            tournament = self.db.get_tournament(tournament_id)
+            tournament = await self.db.get_tournament(tournament_id)
             if not tournament:
                 await interaction.response.send_message(
                     get_translation('tournament.not_found'), 
@@ -159,7 +160,7 @@ class TournamentCommands(commands.Cog):
     @app_commands.command(name="tournament", description="Show tournament information")
     async def show_tournament(self, interaction: discord.Interaction):
         """Show current tournament information"""
-        tournaments = self.db.get_all_tournaments()
+        tournaments = await self.db.get_all_tournaments()
         
         if not tournaments:
             embed = discord.Embed(
@@ -235,9 +236,10 @@ class TournamentCommands(commands.Cog):
             )
             return
         
-        players = self.db.get_all_players()
+        # Top players by wins, then by kills
+        top_players = await self.db.get_top_players('wins', limit)
         
-        if not players:
+        if not top_players:
             embed = discord.Embed(
                 title="📊 Empty Leaderboard",
                 description="No players have registered yet",
@@ -246,26 +248,21 @@ class TournamentCommands(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
         
-        # Sort players by wins, then by kills
-        sorted_players = sorted(
-            players.values(),
-            key=lambda p: (p.get('wins', 0), p.get('kills', 0)),
-            reverse=True
-        )
-        
         embed = discord.Embed(
             title="🏆 Tournament Leaderboard",
-            description=f"Top {min(limit, len(sorted_players))} players",
+            description=f"Top {len(top_players)} players",
             color=0xFFD700,
             timestamp=datetime.now()
         )
         
-        for i, player in enumerate(sorted_players[:limit], 1):
-            try:
-                user = await interaction.client.fetch_user(int(player['user_id']))
-                name = user.display_name
-            except:
-                name = player.get('name', 'Unknown')
+        names = await self.names.resolve(
+            [player['user_id'] for player in top_players],
+            guild=interaction.guild,
+            fallbacks={player['user_id']: player.get('name') for player in top_players}
+        )
+        
+        for i, player in enumerate(top_players, 1):
+            name = names[player['user_id']]
             
             wins = player.get('wins', 0)
             losses = player.get('losses', 0)
@@ -302,9 +299,10 @@ class TournamentCommands(commands.Cog):
             )
             return
         
-        players = self.db.get_all_players()
+        # Top players by kills, then by KD ratio
+        top_players = await self.db.get_top_players('kills', limit)
         
-        if not players:
+        if not top_players:
             embed = discord.Embed(
                 title="⚔️ No Kill Stats",
                 description="No players have recorded kills yet",
@@ -313,26 +311,21 @@ class TournamentCommands(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
         
-        # Sort players by kills, then by KD ratio
-        sorted_players = sorted(
-            players.values(),
-            key=lambda p: (p.get('kills', 0), p.get('kills', 0) / max(p.get('deaths', 1), 1)),
-            reverse=True
-        )
-        
         embed = discord.Embed(
             title="⚔️ Kill Statistics",
-            description=f"Top {min(limit, len(sorted_players))} killers",
+            description=f"Top {len(top_players)} killers",
             color=0xFF4444,
             timestamp=datetime.now()
         )
         
-        for i, player in enumerate(sorted_players[:limit], 1):
-            try:
-                user = await interaction.client.fetch_user(int(player['user_id']))
-                name = user.display_name
-            except:
-                name = player.get('name', 'Unknown')
+        names = await self.names.resolve(
+            [player['user_id'] for player in top_players],
+            guild=interaction.guild,
+            fallbacks={player['user_id']: player.get('name') for player in top_players}
+        )
+        
+        for i, player in enumerate(top_players, 1):
+            name = names[player['user_id']]
             
             kills = player.get('kills', 0)
             deaths = player.get('deaths', 0)
@@ -1,23 +1,243 @@
+import atexit
+import bisect
+import copy
+import itertools
 import json
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 import logging
+from utils.file_lock import FileLock
+import snapshot
+from models import PLAYER_RANKINGS, Match, Player, job_fired, mark_job_fired
+from utils.ratings import DEFAULT_RATING, match_score, rate_match, replay
+from utils.skiplist import IndexedSkipList
 
 logger = logging.getLogger(__name__)
 
-class Database:
+class MatchIndex:
+    """Secondary indexes over matches, kept current on every change
+    
+    Maps status and player ids to match ids, and keeps scheduled matches
+    sorted by scheduled time and all matches sorted by creation time, both
+    overall and per status.
+    """
+    
+    def __init__(self):
+        self.entries = {}
+        self.by_status = {}
+        self.by_player = {}
+        self.scheduled = []
+        self.created = []
+        self.created_by_status = {}
+    
+    def rebuild(self, matches):
+        """Index a whole collection from scratch"""
+        self.__init__()
+        for match_id, match in matches.items():
+            self.update(match_id, match)
+    
+    def update(self, match_id, match):
+        """Re-index one match; a None match removes it"""
+        old = self.entries.pop(match_id, None)
+        if old is not None:
+            status, players, scheduled_time, created_at = old
+            self.by_status[status].discard(match_id)
+            for player_id in players:
+                self.by_player[player_id].discard(match_id)
+            if status == 'scheduled' and scheduled_time:
+                self._remove_sorted(self.scheduled, (scheduled_time, match_id))
+            self._remove_sorted(self.created, (created_at or '', match_id))
+            self._remove_sorted(self.created_by_status[status], (created_at or '', match_id))
+        
+        if match is None:
+            return
+        
+        status = match.get('status')
+        players = {str(p) for p in (match.get('player1_id'), match.get('player2_id')) if p}
+        scheduled_time = match.get('scheduled_time')
+        created_at = match.get('created_at')
+        self.entries[match_id] = (status, players, scheduled_time, created_at)
+        
+        self.by_status.setdefault(status, set()).add(match_id)
+        for player_id in players:
+            self.by_player.setdefault(player_id, set()).add(match_id)
+        if status == 'scheduled' and scheduled_time:
+            bisect.insort(self.scheduled, (scheduled_time, match_id))
+        bisect.insort(self.created, (created_at or '', match_id))
+        bisect.insort(self.created_by_status.setdefault(status, []), (created_at or '', match_id))
+    
+    def _remove_sorted(self, items, item):
+        position = bisect.bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+    
+    def status_counts(self):
+        """Count matches per status"""
+        return {status: len(ids) for status, ids in self.by_status.items() if ids}
+    
+    def scheduled_between(self, start=None, end=None):
+        """Ids of scheduled matches with start <= scheduled_time < end, in time order"""
+        low = bisect.bisect_left(self.scheduled, (start,)) if start else 0
+        high = bisect.bisect_left(self.scheduled, (end,)) if end else len(self.scheduled)
+        return [match_id for _, match_id in self.scheduled[low:high]]
+    
+    def most_recent(self, limit):
+        """Ids of the most recently created matches, newest first"""
+        return [match_id for _, match_id in reversed(self.created[-limit:])] if limit > 0 else []
+    
+    def created_before(self, limit, before=None, status=None, player_id=None):
+        """(created_at, id) of up to limit matches created before the before key, newest first
+        
+        A player's matches are sorted on demand, which costs their own
+        history rather than the whole collection.
+        """
+        if player_id is not None:
+            items = []
+            for match_id in self.by_player.get(player_id, ()):
+                match_status, _, _, created_at = self.entries[match_id]
+                if status is None or match_status == status:
+                    items.append((created_at or '', match_id))
+            items.sort()
+        elif status is not None:
+            items = self.created_by_status.get(status, [])
+        else:
+            items = self.created
+        end = bisect.bisect_left(items, tuple(before)) if before is not None else len(items)
+        return items[max(0, end - limit):end][::-1]
+
+class PlayerRankIndex:
+    """Players kept sorted for every leaderboard ranking in PLAYER_RANKINGS
+    
+    Each ranking is an IndexedSkipList of (negated score, user_id), best
+    first. A stats update removes and re-inserts one entry per ranking, a
+    player's rank is one bisect and the top k players one positional
+    lookup plus k steps, all O(log n).
+    """
+    
     def __init__(self):
+        self.entries = {}
+        self.rankings = {name: IndexedSkipList() for name in PLAYER_RANKINGS}
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _items(self, user_id, player):
+        record = Player.from_dict(player, user_id=user_id)
+        return {name: (tuple(-value for value in key(record)), user_id)
+                for name, key in PLAYER_RANKINGS.items()}
+    
+    def rebuild(self, players):
+        """Index a whole collection from scratch"""
+        self.entries = {user_id: self._items(user_id, player) for user_id, player in players.items()}
+        # One sort and linking pass per ranking instead of an insert per player
+        self.rankings = {name: IndexedSkipList(entry[name] for entry in self.entries.values())
+                         for name in PLAYER_RANKINGS}
+    
+    def update(self, user_id, player):
+        """Re-rank one player; a None player removes it"""
+        old = self.entries.pop(user_id, None)
+        new = self._items(user_id, player) if player is not None else None
+        for name, items in self.rankings.items():
+            if old is not None:
+                items.remove(old[name])
+            if new is not None:
+                items.insert(new[name])
+        if new is not None:
+            self.entries[user_id] = new
+    
+    def top(self, ranking, limit=None, offset=0):
+        """User ids of the players ranked offset+1 to offset+limit (all when limit is None)"""
+        end = offset + limit if limit is not None else None
+        return [user_id for _, user_id in self.rankings[ranking].slice(offset, end)]
+    
+    def after(self, ranking, limit, after=None):
+        """(score, user_id) of up to limit players ranked after the after key, best first"""
+        items = self.rankings[ranking]
+        start = 0
+        if after is not None:
+            score, user_id = after
+            start = items.bisect_right((tuple(-value for value in score), user_id))
+        return [(tuple(-value for value in negated), user_id) for negated, user_id in items.slice(start, start + limit)]
+    
+    def rank(self, user_id, ranking):
+        """1-based rank of a player, players with equal scores sharing a rank"""
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        # Count the players with a strictly better score
+        return self.rankings[ranking].bisect_left((entry[ranking][0],)) + 1
+
+class Database:
+    def __init__(self, journal=None, compact_threshold=1024 * 1024, compact_interval=60, commit_window=None,
+                 storage_format=None):
         self.data_dir = "data"
         self.ensure_data_directory()
         
+        # Collections are stored as pretty-printed JSON or as compact binary snapshots
+        if storage_format is None:
+            storage_format = os.environ.get('DATABASE_FORMAT', 'json').lower()
+        self.binary = storage_format == 'binary'
+        extension = ".snap" if self.binary else ".json"
+        
         # File paths
-        self.players_file = os.path.join(self.data_dir, "players.json")
-        self.matches_file = os.path.join(self.data_dir, "matches.json")
-        self.tournaments_file = os.path.join(self.data_dir, "tournaments.json")
+        self.players_file = os.path.join(self.data_dir, "players" + extension)
+        self.matches_file = os.path.join(self.data_dir, "matches" + extension)
+        self.tournaments_file = os.path.join(self.data_dir, "tournaments" + extension)
+        
+        # Journal mode appends each change to a .log file next to the snapshot
+        # instead of rewriting the whole collection
+        if journal is None:
+            journal = os.environ.get('DATABASE_JOURNAL', '').lower() in ('1', 'true', 'yes')
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        
+        # Writes landing within the commit window are flushed together with one
+        # fsync per file; 0 writes every change immediately
+        if commit_window is None:
+            commit_window = float(os.environ.get('DATABASE_COMMIT_WINDOW_MS', 0)) / 1000
+        self.commit_window = commit_window
+        
+        # Parsed collections keyed by file path: (file stamp, data). Readers
+        # use them without the lock: writers put new keys into a copy of the
+        # collection and replace changed records instead of editing them, so
+        # a reader always sees whole records
+        self._cache = {}
+        # Bytes of each journal already applied to the cached collection
+        self._log_offsets = {}
+        self._lock = threading.RLock()
+        # Advisory lock held across read-modify-write so other processes
+        # (web dashboard, restarted bots) cannot interleave their writes
+        self._file_lock = FileLock(os.path.join(self.data_dir, ".lock"))
+        self._write_depth = 0
+        # Collection file -> keys changed by the open transaction
+        self._transaction = None
+        self._stop_compactor = threading.Event()
+        # Changes waiting for the commit window to close
+        self._pending_files = {}
+        self._pending_log = {}
+        self._flush_timer = None
+        
+        # Secondary indexes, rebuilt on reload and updated on each record change
+        self.match_index = MatchIndex()
+        self.player_ranks = PlayerRankIndex()
+        self._indexes = {self.matches_file: [self.match_index], self.players_file: [self.player_ranks]}
+        self._listeners = []
+        # Data version, moved by every change; see data_version()
+        self._versions = itertools.count(1)
+        self.version = 0
+        self._stop_watcher = threading.Event()
         
         # Initialize files if they don't exist
         self.init_files()
+        
+        if self.journal:
+            self.start_compactor()
+        if self.commit_window > 0:
+            atexit.register(self.flush)
     
     def ensure_data_directory(self):
         """Ensure data directory exists"""
@@ -25,26 +245,379 @@ class Database:
             os.makedirs(self.data_dir)
     
     def init_files(self):
-        """Initialize JSON files if they don't exist"""
+        """Initialize data files if they don't exist"""
         for file_path in [self.players_file, self.matches_file, self.tournaments_file]:
-            if not os.path.exists(file_path):
-                self.save_json(file_path, {})
+            if os.path.exists(file_path):
+                continue
+            json_path = os.path.splitext(file_path)[0] + ".json"
+            if self.binary and os.path.exists(json_path):
+                # First start in binary mode: convert the existing JSON store
+                snapshot.convert_json_file(json_path)
+            else:
+                self.write_json_file(file_path, {})
     
-    def load_json(self, file_path):
-        """Load JSON data from file"""
+    @contextmanager
+    def write_lock(self):
+        """Hold the thread lock and the cross-process file lock for a read-modify-write
+        
+        Reentrant within a thread. While changes wait in the commit window the
+        file lock stays held until they are flushed.
+        """
+        with self._lock:
+            if self._write_depth == 0:
+                self._file_lock.acquire()
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+                self.release_file_lock()
+    
+    def release_file_lock(self):
+        """Release the file lock once no writer or pending change needs it"""
+        if self._write_depth == 0 and not self._pending_files and not self._pending_log:
+            self._file_lock.release()
+    
+    def file_stamp(self, file_path):
+        """Identify the on-disk version of a file (inode, mtime, size)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def load_json(self, file_path):
+        """Load JSON data from file, reusing the cached copy while the file is unchanged
+        
+        The returned dict is the shared in-memory copy; it is re-read only when
+        another process replaces or modifies the file. In journal mode any log
+        entries not yet seen are replayed on top of the snapshot.
+        """
+        with self._lock:
+            stamp = self.file_stamp(file_path)
+            cached = self._cache.get(file_path)
+            if cached is None or stamp is None or cached[0] != stamp:
+                try:
+                    data = self.read_data_file(file_path)
+                except FileNotFoundError:
+                    self.rebuild_indexes(file_path, {})
+                    return {}
+                except (json.JSONDecodeError, snapshot.SnapshotError) as e:
+                    # Keep serving the last good copy rather than an empty store
+                    logger.error(f"Error reading {file_path}: {e}")
+                    return cached[1] if cached is not None else {}
+                
+                cached = (stamp, data)
+                self._cache[file_path] = cached
+                self._log_offsets[file_path] = 0
+                self.rebuild_indexes(file_path, data)
+            
+            if self.journal:
+                return self.replay_journal(file_path)
+            return cached[1]
+    
+    def read_data_file(self, file_path):
+        """Parse a collection file in the configured storage format"""
+        if self.binary:
+            with open(file_path, 'rb') as f:
+                return snapshot.loads(f.read())
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     
     def save_json(self, file_path, data):
-        """Save JSON data to file"""
+        """Save JSON data to file and keep it as the cached copy"""
+        with self._lock:
+            if self.commit_window > 0:
+                stamp = self._cache.get(file_path, (self.file_stamp(file_path),))[0]
+                self._cache[file_path] = (stamp, data)
+                self._pending_files[file_path] = data
+                self.schedule_flush()
+            else:
+                self.write_json_file(file_path, data)
+    
+    def write_json_file(self, file_path, data):
+        """Atomically replace a collection file so readers never see a partial write"""
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if self.binary:
+                with open(temp_path, 'wb') as f:
+                    f.write(snapshot.dumps(data))
+                    f.flush()
+                    os.fsync(f.fileno())
+            else:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+            self._cache[file_path] = (self.file_stamp(file_path), data)
+            return True
         except Exception as e:
+            # The cached copy may hold changes that never reached disk
+            self._cache.pop(file_path, None)
             logger.error(f"Error saving to {file_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+    
+    def write_record(self, file_path, data, key):
+        """Persist a change to one record of a collection
+        
+        Rewrites the whole file normally, or appends a single entry to the
+        journal in journal mode. Inside a transaction the write is deferred
+        until the transaction commits.
+        """
+        with self._lock:
+            self.update_indexes(file_path, key, data.get(key))
+            if self._transaction is not None:
+                stamp = self._cache.get(file_path, (self.file_stamp(file_path),))[0]
+                self._cache[file_path] = (stamp, data)
+                self._transaction.setdefault(file_path, []).append(key)
+            else:
+                self.persist_records(file_path, data, [key])
+            # Again now that readers see the change, so nothing rendered from
+            # the old data is kept under the version notify_listeners set
+            self.version = next(self._versions)
+    
+    def persist_records(self, file_path, data, keys):
+        """Write the changed records of a collection to disk"""
+        if not self.journal:
+            self.save_json(file_path, data)
+            return
+        
+        entries = [json.dumps({'key': key, 'value': data.get(key)}, ensure_ascii=False) for key in keys]
+        stamp = self._cache.get(file_path, (self.file_stamp(file_path),))[0]
+        self._cache[file_path] = (stamp, data)
+        if self.commit_window > 0:
+            self._pending_log.setdefault(file_path, []).extend(entries)
+            self.schedule_flush()
+        else:
+            self.append_journal(file_path, entries)
+    
+    @contextmanager
+    def transaction(self):
+        """Group several changes into one write per collection
+        
+        Changes made inside the block are visible to this process immediately
+        but only reach disk when the block exits. If the block raises, the
+        touched collections are reloaded from disk and nothing is written.
+        Nested transactions join the outer one.
+        """
+        with self.write_lock():
+            if self._transaction is not None:
+                yield self
+                return
+            
+            # Changes already waiting in the commit window must survive a rollback
+            self.flush()
+            self._transaction = {}
+            try:
+                yield self
+            except BaseException:
+                changed, self._transaction = self._transaction, None
+                for file_path in changed:
+                    self._cache.pop(file_path, None)
+                    self._log_offsets.pop(file_path, None)
+                    self.load_json(file_path)
+                raise
+            
+            changed, self._transaction = self._transaction, None
+            for file_path, keys in changed.items():
+                self.persist_records(file_path, self._cache[file_path][1], list(dict.fromkeys(keys)))
+    
+    def append_journal(self, file_path, entries):
+        """Append entries to a collection's journal with a single fsync"""
+        log_path = self.journal_path(file_path)
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                start = f.tell()
+                f.write(''.join(entry + '\n' for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+            # Skip our own entries on replay unless another writer got in first
+            if self._log_offsets.get(file_path, 0) == start:
+                self._log_offsets[file_path] = end
+            return True
+        except Exception as e:
+            self._cache.pop(file_path, None)
+            logger.error(f"Error appending to {log_path}: {e}")
+            return False
+    
+    def schedule_flush(self):
+        """Arm the group commit timer if it is not already running"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.commit_window, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Write all changes waiting in the commit window"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending_files, self._pending_files = self._pending_files, {}
+            pending_log, self._pending_log = self._pending_log, {}
+            for file_path, data in pending_files.items():
+                self.write_json_file(file_path, data)
+            for file_path, entries in pending_log.items():
+                self.append_journal(file_path, entries)
+            self.release_file_lock()
+    
+    def invalidate_cache(self):
+        """Drop all cached collections so the next read goes to disk"""
+        with self._lock:
+            self._cache.clear()
+            self._log_offsets.clear()
+    
+    # Index methods
+    def rebuild_indexes(self, file_path, data):
+        """Rebuild the indexes of a collection after it was (re)loaded"""
+        for index in self._indexes.get(file_path, []):
+            index.rebuild(data)
+        self.notify_listeners(file_path, None, None)
+    
+    def update_indexes(self, file_path, key, value):
+        """Update the indexes of a collection for one changed record"""
+        for index in self._indexes.get(file_path, []):
+            index.update(key, value)
+        self.notify_listeners(file_path, key, value)
+    
+    # Change notification
+    def add_change_listener(self, callback):
+        """Register callback(collection, key, record) for every change
+        
+        collection is 'players', 'matches' or 'tournaments'. key is None when
+        a whole collection was reloaded because another process changed it.
+        Callbacks run under the database lock and must return quickly.
+        """
+        self._listeners.append(callback)
+    
+    def notify_listeners(self, file_path, key, value):
+        """Tell change listeners about a changed record or reloaded collection"""
+        self.version = next(self._versions)
+        collection = os.path.splitext(os.path.basename(file_path))[0]
+        for callback in self._listeners:
+            try:
+                callback(collection, key, value)
+            except Exception as e:
+                logger.error(f"Error in change listener: {e}")
+    
+    def data_version(self):
+        """A number that changes whenever any collection changes, other processes' writes included
+        
+        Anything derived from the data can be cached under it. Costs what
+        check_for_changes() costs.
+        """
+        self.check_for_changes()
+        return self.version
+    
+    def start_change_watcher(self, interval=1.0):
+        """Poll the data files so changes from other processes reach the listeners"""
+        thread = threading.Thread(target=self._watch_loop, args=(interval,), name="database-watcher", daemon=True)
+        thread.start()
+    
+    def stop_change_watcher(self):
+        """Stop the change watcher thread"""
+        self._stop_watcher.set()
+    
+    def check_for_changes(self):
+        """Pick up changes other processes made, notifying the change listeners
+        
+        Costs one stat per data file when nothing changed.
+        """
+        for file_path in [self.players_file, self.matches_file, self.tournaments_file]:
+            try:
+                # Reloads or replays the file if it changed on disk
+                self.load_json(file_path)
+            except Exception as e:
+                logger.error(f"Error watching {file_path}: {e}")
+    
+    def _watch_loop(self, interval):
+        while not self._stop_watcher.wait(interval):
+            self.check_for_changes()
+    
+    # Journal methods
+    def journal_path(self, file_path):
+        """Get the append-only log path for a collection file"""
+        return os.path.splitext(file_path)[0] + '.log'
+    
+    def replay_journal(self, file_path):
+        """Apply journal entries written since the last replay to the cached collection"""
+        stamp, data = self._cache[file_path]
+        offset = self._log_offsets.get(file_path, 0)
+        log_path = self.journal_path(file_path)
+        
+        try:
+            size = os.path.getsize(log_path)
+        except OSError:
+            size = 0
+        
+        if size < offset:
+            # Compacted by another process; the snapshot already holds these entries
+            offset = 0
+        if size == offset:
+            self._log_offsets[file_path] = offset
+            return data
+        
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        
+        # Leave a trailing partial line for the next replay
+        end = chunk.rfind(b'\n') + 1
+        if end:
+            # Copy on write so readers iterating the old mapping are not disturbed
+            data = dict(data)
+            for line in chunk[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt journal entry in {log_path}")
+                    continue
+                data[entry['key']] = entry['value']
+                self.update_indexes(file_path, entry['key'], entry['value'])
+            self._cache[file_path] = (stamp, data)
+        
+        self._log_offsets[file_path] = offset + end
+        return data
+    
+    def compact_journal(self, file_path):
+        """Fold the journal into the snapshot file and truncate the journal"""
+        with self.write_lock():
+            self.flush()
+            data = self.load_json(file_path)
+            if not self.write_json_file(file_path, data):
+                return False
+            with open(self.journal_path(file_path), 'w', encoding='utf-8'):
+                pass
+            self._log_offsets[file_path] = 0
+            return True
+    
+    def start_compactor(self):
+        """Start the background thread that compacts large journals"""
+        thread = threading.Thread(target=self._compact_loop, name="database-compactor", daemon=True)
+        thread.start()
+    
+    def stop_compactor(self):
+        """Stop the background compactor thread"""
+        self._stop_compactor.set()
+    
+    def _compact_loop(self):
+        """Periodically compact journals that have grown past the threshold"""
+        while not self._stop_compactor.wait(self.compact_interval):
+            for file_path in [self.players_file, self.matches_file, self.tournaments_file]:
+                try:
+                    if os.path.getsize(self.journal_path(file_path)) >= self.compact_threshold:
+                        self.compact_journal(file_path)
+                        logger.info(f"Compacted journal for {file_path}")
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.error(f"Error compacting {file_path}: {e}")
     
     def get_current_timestamp(self):
         """Get current timestamp in ISO format"""
@@ -57,189 +630,385 @@ class Database:
     # Player methods
     def register_player(self, user_id, name):
         """Register a new player"""
-        players = self.load_json(self.players_file)
-        
-        if user_id in players:
-            return False
-        
-        player_data = {
-            'user_id': user_id,
-            'name': name,
-            'wins': 0,
-            'losses': 0,
-            'draws': 0,
-            'kills': 0,
-            'deaths': 0,
-            'registered_at': self.get_current_timestamp(),
-            'last_updated': self.get_current_timestamp()
-        }
-        
-        players[user_id] = player_data
-        self.save_json(self.players_file, players)
-        return True
+        with self.write_lock():
+            players = self.load_json(self.players_file)
+            
+            if user_id in players:
+                return False
+            
+            player_data = {
+                'user_id': user_id,
+                'name': name,
+                'wins': 0,
+                'losses': 0,
+                'draws': 0,
+                'kills': 0,
+                'deaths': 0,
+                'registered_at': self.get_current_timestamp(),
+                'last_updated': self.get_current_timestamp()
+            }
+            
+            # New keys go into a copy so readers iterating the cached mapping are safe
+            players = dict(players)
+            players[user_id] = player_data
+            self.write_record(self.players_file, players, user_id)
+            return True
     
     def get_player(self, user_id):
         """Get player data"""
         players = self.load_json(self.players_file)
-        return players.get(user_id)
+        return copy.deepcopy(players.get(user_id))
     
     def get_all_players(self):
-        """Get all players"""
+        """Get all players (shared cached copy, treat as read-only)"""
         return self.load_json(self.players_file)
     
+    def get_top_players(self, ranking='wins', limit=10, offset=0):
+        """Players in leaderboard order for a ranking in PLAYER_RANKINGS; limit None returns all"""
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        with self._lock:
+            players = self.load_json(self.players_file)
+            return [self._ranked_player(players, user_id) for user_id in self.player_ranks.top(ranking, limit, offset)]
+    
+    def get_players_page(self, ranking='wins', limit=50, after=None):
+        """One page of players in leaderboard order, and the key to pass as after for the next
+        
+        Keys are (score, user_id) with score the PLAYER_RANKINGS tuple, so a
+        page continues after the last player shown even if players were
+        added or re-ranked in between. The next key is None on the last page.
+        """
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        with self._lock:
+            players = self.load_json(self.players_file)
+            keys = self.player_ranks.after(ranking, limit + 1, after)
+            page = [self._ranked_player(players, user_id) for _, user_id in keys[:limit]]
+        return page, keys[limit - 1] if len(keys) > limit else None
+    
+    @staticmethod
+    def _ranked_player(players, user_id):
+        # Records written by older commands have no user_id; the key is authoritative
+        player = copy.deepcopy(players[user_id])
+        player['user_id'] = user_id
+        return player
+    
+    def get_player_count(self):
+        """Number of registered players"""
+        return len(self.load_json(self.players_file))
+    
+    def get_player_standing(self, user_id):
+        """Rank, player count and top percentage of a player in every ranking, or None"""
+        with self._lock:
+            self.load_json(self.players_file)
+            total = len(self.player_ranks)
+            standing = {}
+            for ranking in PLAYER_RANKINGS:
+                rank = self.player_ranks.rank(str(user_id), ranking)
+                if rank is None:
+                    return None
+                standing[ranking] = {'rank': rank, 'total': total, 'top_percent': rank / total * 100}
+            return standing
+    
+    def get_player_rank(self, user_id, ranking='wins'):
+        """Leaderboard position of a player (1 is best), or None if not registered"""
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        with self._lock:
+            self.load_json(self.players_file)
+            return self.player_ranks.rank(str(user_id), ranking)
+    
     def update_player_stats(self, user_id, wins=0, losses=0, draws=0, kills=0, deaths=0):
         """Update player statistics"""
-        players = self.load_json(self.players_file)
-        
-        if str(user_id) not in players:
-            return False
-        
-        player = players[str(user_id)]
-        player['wins'] += wins
-        player['losses'] += losses
-        player['draws'] += draws
-        player['kills'] += kills
-        player['deaths'] += deaths
-        player['last_updated'] = self.get_current_timestamp()
-        
-        self.save_json(self.players_file, players)
-        return True
+        with self.write_lock():
+            players = self.load_json(self.players_file)
+            
+            if str(user_id) not in players:
+                return False
+            
+            player = players[str(user_id)]
+            players[str(user_id)] = dict(
+                player,
+                wins=player['wins'] + wins,
+                losses=player['losses'] + losses,
+                draws=player['draws'] + draws,
+                kills=player['kills'] + kills,
+                deaths=player['deaths'] + deaths,
+                last_updated=self.get_current_timestamp()
+            )
+            
+            self.write_record(self.players_file, players, str(user_id))
+            return True
+    
+    def update_ratings(self, player1_id, player2_id, score1):
+        """Apply one result to both players' Elo ratings (score1: 1 win, 0.5 draw, 0 loss)"""
+        with self.transaction():
+            players = self.load_json(self.players_file)
+            player1 = players.get(str(player1_id))
+            player2 = players.get(str(player2_id))
+            if not player1 or not player2:
+                return False
+            
+            rating1, rating2 = rate_match(
+                player1.get('rating', DEFAULT_RATING), player2.get('rating', DEFAULT_RATING), score1
+            )
+            players[str(player1_id)] = dict(player1, rating=rating1)
+            players[str(player2_id)] = dict(player2, rating=rating2)
+            self.write_record(self.players_file, players, str(player1_id))
+            self.write_record(self.players_file, players, str(player2_id))
+            return True
+    
+    def recompute_ratings(self):
+        """Replay every completed match in order and store the resulting ratings"""
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            records = sorted(
+                (Match.from_dict(match, match_id=match_id) for match_id, match in matches.items()),
+                key=lambda match: match.completed_at or match.created_at or ''
+            )
+            ratings = replay(result for result in map(match_score, records) if result)
+            
+            players = self.load_json(self.players_file)
+            changed = []
+            for user_id, player in players.items():
+                rating = ratings.get(user_id, DEFAULT_RATING)
+                if player.get('rating') != rating:
+                    players[user_id] = dict(player, rating=rating)
+                    changed.append(user_id)
+            
+            # One index rebuild and one write instead of one per player
+            if changed:
+                self.rebuild_indexes(self.players_file, players)
+                self.persist_records(self.players_file, players, changed)
+            logger.info(f"Recomputed ratings for {len(changed)} players")
+            return len(changed)
+    
+    def update_player(self, user_id, player_data):
+        """Replace a player's data"""
+        with self.write_lock():
+            players = self.load_json(self.players_file)
+            if user_id not in players:
+                players = dict(players)
+            players[user_id] = player_data
+            self.write_record(self.players_file, players, user_id)
+            return player_data
     
     # Match methods
     def create_match(self, challenger_id, opponent_id, scheduled_time, description="Duel Match"):
         """Create a new match"""
-        matches = self.load_json(self.matches_file)
-        match_id = self.generate_id()
-        
-        match_data = {
-            'id': match_id,
-            'player1_id': challenger_id,
-            'player2_id': opponent_id,
-            'scheduled_time': scheduled_time,
-            'description': description,
-            'status': 'scheduled',
-            'created_at': self.get_current_timestamp(),
-            'completed_at': None,
-            'winner_id': None,
-            'reminder_sent': False,
-            'result': None
-        }
-        
-        matches[match_id] = match_data
-        self.save_json(self.matches_file, matches)
-        return match_id
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            match_id = self.generate_id()
+            
+            match_data = {
+                'id': match_id,
+                'player1_id': challenger_id,
+                'player2_id': opponent_id,
+                'scheduled_time': scheduled_time,
+                'description': description,
+                'status': 'scheduled',
+                'created_at': self.get_current_timestamp(),
+                'completed_at': None,
+                'winner_id': None,
+                'reminder_sent': False,
+                'result': None
+            }
+            
+            matches = dict(matches)
+            matches[match_id] = match_data
+            self.write_record(self.matches_file, matches, match_id)
+            return match_id
     
     def get_upcoming_matches(self):
         """Get all upcoming scheduled matches"""
-        matches = self.load_json(self.matches_file)
-        upcoming = []
-        
-        for match_id, match_data in matches.items():
-            if match_data.get('status') == 'scheduled':
-                match_data['id'] = match_id
-                upcoming.append(match_data)
-        
-        # Sort by scheduled time
-        upcoming.sort(key=lambda x: x['scheduled_time'])
-        return upcoming
+        with self._lock:
+            matches = self.load_json(self.matches_file)
+            # Already sorted by scheduled time
+            return [dict(matches[match_id], id=match_id) for match_id in self.match_index.scheduled_between()]
     
     def update_match_reminder_status(self, match_id, sent):
         """Update reminder sent status for a match"""
-        matches = self.load_json(self.matches_file)
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            
+            if match_id in matches:
+                matches[match_id] = dict(matches[match_id], reminder_sent=sent)
+                self.write_record(self.matches_file, matches, match_id)
+                return True
+            return False
+    
+    def claim_match_job(self, match_id, kind):
+        """Record that a scheduled 'reminder' or 'start' job is firing
         
-        if match_id in matches:
-            matches[match_id]['reminder_sent'] = sent
-            self.save_json(self.matches_file, matches)
+        Returns False if the match is gone, no longer scheduled, or the job
+        already fired in this or another process, so each job runs once.
+        """
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            match = matches.get(match_id)
+            if not match or match.get('status') != 'scheduled' or job_fired(match, kind):
+                return False
+            
+            matches[match_id] = mark_job_fired(match, kind, self.get_current_timestamp())
+            self.write_record(self.matches_file, matches, match_id)
             return True
-        return False
     
     def update_match_status(self, match_id, status):
         """Update match status"""
-        matches = self.load_json(self.matches_file)
-        
-        if match_id in matches:
-            matches[match_id]['status'] = status
-            matches[match_id]['last_updated'] = self.get_current_timestamp()
-            self.save_json(self.matches_file, matches)
-            return True
-        return False
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            
+            if match_id in matches:
+                matches[match_id] = dict(matches[match_id], status=status,
+                                         last_updated=self.get_current_timestamp())
+                self.write_record(self.matches_file, matches, match_id)
+                return True
+            return False
     
     def record_match_result(self, match_id, result_data):
         """Record the result of a completed match"""
-        matches = self.load_json(self.matches_file)
-        
-        if match_id in matches:
-            matches[match_id]['result'] = result_data
-            matches[match_id]['status'] = 'completed'
-            matches[match_id]['completed_at'] = self.get_current_timestamp()
-            matches[match_id]['winner_id'] = result_data.get('winner_id')
-            self.save_json(self.matches_file, matches)
-            return True
-        return False
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            
+            if match_id in matches:
+                matches[match_id] = dict(
+                    matches[match_id],
+                    result=result_data,
+                    status='completed',
+                    completed_at=self.get_current_timestamp(),
+                    winner_id=result_data.get('winner_id')
+                )
+                self.write_record(self.matches_file, matches, match_id)
+                return True
+            return False
     
     def cancel_match(self, match_id):
         """Cancel a scheduled match"""
-        matches = self.load_json(self.matches_file)
-        
-        if match_id in matches:
-            matches[match_id]['status'] = 'cancelled'
-            matches[match_id]['cancelled_at'] = self.get_current_timestamp()
-            self.save_json(self.matches_file, matches)
-            return True
-        return False
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            
+            if match_id in matches:
+                matches[match_id] = dict(matches[match_id], status='cancelled',
+                                         cancelled_at=self.get_current_timestamp())
+                self.write_record(self.matches_file, matches, match_id)
+                return True
+            return False
     
     def get_match(self, match_id):
         """Get match by ID"""
         matches = self.load_json(self.matches_file)
-        return matches.get(match_id)
+        return copy.deepcopy(matches.get(match_id))
     
     def update_match(self, match_id, match_data):
         """Update match data"""
-        matches = self.load_json(self.matches_file)
-        matches[match_id] = match_data
-        self.save_json(self.matches_file, matches)
-        return match_data
+        with self.write_lock():
+            matches = self.load_json(self.matches_file)
+            if match_id not in matches:
+                matches = dict(matches)
+            matches[match_id] = match_data
+            self.write_record(self.matches_file, matches, match_id)
+            return match_data
     
     def get_all_matches(self):
-        """Get all matches"""
+        """Get all matches (shared cached copy, treat as read-only)"""
         return self.load_json(self.matches_file)
     
+    def get_match_status_counts(self):
+        """Count matches per status"""
+        with self._lock:
+            self.load_json(self.matches_file)
+            return self.match_index.status_counts()
+    
+    def get_matches_by_status(self, status):
+        """Get all matches with the given status"""
+        with self._lock:
+            matches = self.load_json(self.matches_file)
+            return [copy.deepcopy(matches[match_id]) for match_id in self.match_index.by_status.get(status, ())]
+    
+    def get_player_matches(self, user_id):
+        """Get all matches a player takes part in, soonest scheduled first"""
+        with self._lock:
+            matches = self.load_json(self.matches_file)
+            player_matches = [copy.deepcopy(matches[match_id]) for match_id in self.match_index.by_player.get(str(user_id), ())]
+        player_matches.sort(key=lambda m: m.get('scheduled_time') or '')
+        return player_matches
+    
+    def get_recent_matches(self, limit=10):
+        """Get the most recently created matches, newest first"""
+        with self._lock:
+            matches = self.load_json(self.matches_file)
+            return [copy.deepcopy(matches[match_id]) for match_id in self.match_index.most_recent(limit)]
+    
+    def get_matches_page(self, limit=50, before=None, status=None, player_id=None):
+        """One page of matches, newest first, and the key to pass as before for the next
+        
+        Keys are (created_at, id). Optionally only matches with a status or
+        involving a player. The next key is None on the last page.
+        """
+        with self._lock:
+            matches = self.load_json(self.matches_file)
+            keys = self.match_index.created_before(limit + 1, before, status,
+                                                   str(player_id) if player_id is not None else None)
+            page = [copy.deepcopy(matches[match_id]) for _, match_id in keys[:limit]]
+        return page, keys[limit - 1] if len(keys) > limit else None
+    
     # Tournament methods
     def create_tournament(self, name, description, max_players, creator_id):
         """Create a new tournament"""
-        tournaments = self.load_json(self.tournaments_file)
-        tournament_id = self.generate_id()
-        
-        tournament_data = {
-            'id': tournament_id,
-            'name': name,
-            'description': description,
-            'max_players': max_players,
-            'creator_id': creator_id,
-            'participants': [],
-            'status': 'registration',
-            'created_at': self.get_current_timestamp(),
-            'started_at': None,
-            'completed_at': None,
-            'matches': []
-        }
-        
-        tournaments[tournament_id] = tournament_data
-        self.save_json(self.tournaments_file, tournaments)
-        return tournament_id
+        with self.write_lock():
+            tournaments = self.load_json(self.tournaments_file)
+            tournament_id = self.generate_id()
+            
+            tournament_data = {
+                'id': tournament_id,
+                'name': name,
+                'description': description,
+                'max_players': max_players,
+                'creator_id': creator_id,
+                'participants': [],
+                'status': 'registration',
+                'created_at': self.get_current_timestamp(),
+                'started_at': None,
+                'completed_at': None,
+                'matches': []
+            }
+            
+            tournaments = dict(tournaments)
+            tournaments[tournament_id] = tournament_data
+            self.write_record(self.tournaments_file, tournaments, tournament_id)
+            return tournament_id
     
     def get_tournament(self, tournament_id):
         """Get tournament by ID"""
         tournaments = self.load_json(self.tournaments_file)
-        return tournaments.get(tournament_id)
+        return copy.deepcopy(tournaments.get(tournament_id))
     
     def update_tournament(self, tournament_id, tournament_data):
         """Update tournament data"""
-        tournaments = self.load_json(self.tournaments_file)
-        tournaments[tournament_id] = tournament_data
-        self.save_json(self.tournaments_file, tournaments)
-        return tournament_data
+        with self.write_lock():
+            tournaments = self.load_json(self.tournaments_file)
+            if tournament_id not in tournaments:
+                tournaments = dict(tournaments)
+            tournaments[tournament_id] = tournament_data
+            self.write_record(self.tournaments_file, tournaments, tournament_id)
+            return tournament_data
     
     def get_all_tournaments(self):
-        """Get all tournaments"""
+        """Get all tournaments (shared cached copy, treat as read-only)"""
         return self.load_json(self.tournaments_file)
+    
+    def get_tournament_status_counts(self):
+        """Count tournaments per status"""
+        counts = {}
+        for tournament in self.load_json(self.tournaments_file).values():
+            status = tournament.get('status')
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+def create_database():
+    """Create the storage backend selected by DATABASE_BACKEND (json or sqlite)"""
+    backend = os.environ.get('DATABASE_BACKEND', 'json').lower()
+    if backend == 'sqlite':
+        from sqlite_database import SqliteDatabase
+        return SqliteDatabase()
+    return Database()
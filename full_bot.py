@@ -6,7 +6,7 @@ All 15 commands with full functionality + Advanced Messaging System
 
 import os
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 import json
 from datetime import datetime, timedelta
@@ -14,6 +14,13 @@ import uuid
 import asyncio
 import logging
 
+from models import job_fired, mark_job_fired
+from utils.dm_queue import DMDeliveryQueue
+from utils.embeds import render_duel_embed
+from utils.ratings import DEFAULT_RATING, rate_match
+from utils.scheduler import MatchScheduler
+from utils.season_stats import SeasonStats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,11 +37,41 @@ def load_data(filename):
 def save_data(filename, data):
     try:
         os.makedirs("data", exist_ok=True)
-        with open(f"data/{filename}", 'w', encoding='utf-8') as f:
+        in_sync = season_stamps.get(filename) == file_stamp(filename)
+        # Write to a temp file and rename so readers never see a half-written file
+        temp_path = f"data/{filename}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, f"data/{filename}")
+        # Our own writes reach the season stats through update_player/update_match
+        if in_sync:
+            season_stamps[filename] = file_stamp(filename)
     except Exception as e:
         print(f"Error saving {filename}: {e}")
 
+def file_stamp(filename):
+    try:
+        stat = os.stat(f"data/{filename}")
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+# Kill/death aggregates for /kill_stats, updated as results are recorded
+season_stats = SeasonStats()
+season_stamps = {}
+
+def current_season_stats():
+    """Season stats, reloaded only when another process changed the data files"""
+    stamps = {filename: file_stamp(filename) for filename in ("players.json", "matches.json")}
+    if stamps != season_stamps:
+        season_stats.load(load_data("players.json"), load_data("matches.json"))
+        season_stamps.update(stamps)
+    return season_stats
+
+EMBED_BRAND = "Clan Lords |Bombsquad"
+
 def generate_id():
     return str(uuid.uuid4())[:8]
 
@@ -50,6 +87,8 @@ class DuelLordsBot(commands.Bot):
         self.reminder_task_started = False
 
 bot = DuelLordsBot()
+reminder_scheduler = MatchScheduler(bot)
+dm_queue = DMDeliveryQueue(bot)
 
 @bot.event
 async def on_ready():
@@ -67,99 +106,38 @@ async def on_ready():
     except Exception as e:
         print(f'❌ Sync failed: {e}')
     
-    # Start reminder task
+    # Arm reminder and start timers for the stored duels
     if not bot.reminder_task_started:
-        duel_reminder_task.start()
+        reminder_scheduler.set_handlers(on_reminder=send_duel_reminder, on_start=start_duel, claim=claim_duel)
+        reminder_scheduler.load_matches(load_data("matches.json"))
         bot.reminder_task_started = True
         print('✅ Clan Lords reminder system started')
     
     await bot.change_presence(activity=discord.Game(name="Clan Lords |Bombsquad | /help"))
     print('✅ Bot ready with all 15 commands!')
 
-@tasks.loop(minutes=1)
-async def duel_reminder_task():
-    """Check for upcoming duels and send reminders"""
-    try:
-        matches = load_data("matches.json")
-        current_time = datetime.now()
-        
-        for match_id, match in matches.items():
-            if match['status'] != 'scheduled':
-                continue
-                
-            match_time = datetime.fromisoformat(match['scheduled_time'])
-            time_diff = match_time - current_time
-            
-            # Send reminder 5 minutes before
-            if timedelta(minutes=4, seconds=30) <= time_diff <= timedelta(minutes=5, seconds=30):
-                if not match.get('reminder_sent', False):
-                    await send_duel_reminder(match)
-                    # Update reminder status
-                    matches[match_id]['reminder_sent'] = True
-                    save_data("matches.json", matches)
-            
-            # Start the duel if time has come
-            elif time_diff.total_seconds() <= 0 and match['status'] == 'scheduled':
-                await start_duel(match)
-                matches[match_id]['status'] = 'in_progress'
-                save_data("matches.json", matches)
-                
-    except Exception as e:
-        logger.error(f"Error in duel reminder task: {e}")
+async def claim_duel(match_id, kind):
+    """Scheduler claim: record a reminder/start job as fired, False if it already was"""
+    matches = load_data("matches.json")
+    match = matches.get(match_id)
+    if not match or match['status'] != 'scheduled' or job_fired(match, kind):
+        return False
+    
+    matches[match_id] = mark_job_fired(match, kind, datetime.now().isoformat())
+    if kind == 'start':
+        matches[match_id]['status'] = 'in_progress'
+    save_data("matches.json", matches)
+    return True
 
 async def send_duel_reminder(match):
     """Send duel reminder to both players"""
     try:
-        scheduled_time = datetime.fromisoformat(match['scheduled_time'])
-        
-        # Create reminder embed
-        embed = discord.Embed(
-            title="⏰ تذكير مبارزة!",
-            description="مبارزتك تبدأ خلال 5 دقائق!",
-            color=0xFF6B35,
-            timestamp=datetime.now()
-        )
-        
-        embed.add_field(
-            name="⚔️ المبارزة",
-            value=f"<@{match['player1_id']}> **VS** <@{match['player2_id']}>",
-            inline=False
-        )
-        
-        embed.add_field(
-            name="🕐 الموعد",
-            value=f"<t:{int(scheduled_time.timestamp())}:F>",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="🌐 الخادم",
-            value="**IP:** `18.228.228.44`\n**Port:** `3827`",
-            inline=True
-        )
+        # Static parts come from the cached template; only the players and time are filled in
+        embed = render_duel_embed('reminder', match, locale='ar', brand=EMBED_BRAND)
         
-        embed.add_field(
-            name="📝 تعليمات",
-            value="• ادخل إلى لعبة BombSquad الآن\n• اتصل بالخادم\n• استعد للمعركة!",
-            inline=False
-        )
-        
-        embed.set_footer(text="Clan Lords |Bombsquad • حان وقت المعركة!")
-        
-        # Send to both players
-        try:
-            player1 = await bot.fetch_user(int(match['player1_id']))
-            await player1.send(embed=embed)
-            print(f"✅ تذكير أرسل إلى {player1.display_name}")
-        except:
-            print(f"❌ فشل إرسال تذكير إلى player1 {match['player1_id']}")
-        
-        try:
-            player2 = await bot.fetch_user(int(match['player2_id']))
-            await player2.send(embed=embed)
-            print(f"✅ تذكير أرسل إلى {player2.display_name}")
-        except:
-            print(f"❌ فشل إرسال تذكير إلى player2 {match['player2_id']}")
+        # Queue for both players; the delivery queue retries and skips closed DMs
+        for player_id in [match['player1_id'], match['player2_id']]:
+            await dm_queue.send(int(player_id), label="duel reminder", embed=embed)
             
     except Exception as e:
         logger.error(f"Error sending duel reminder: {e}")
@@ -167,41 +145,11 @@ async def send_duel_reminder(match):
 async def start_duel(match):
     """Send duel start notification"""
     try:
-        embed = discord.Embed(
-            title="🚀 بدء المبارزة الآن!",
-            description="المبارزة بدأت! اذهبوا إلى الخادم فوراً",
-            color=0x43B581,
-            timestamp=datetime.now()
-        )
-        
-        embed.add_field(
-            name="⚔️ المتبارزون",
-            value=f"<@{match['player1_id']}> **VS** <@{match['player2_id']}>",
-            inline=False
-        )
+        embed = render_duel_embed('start', match, locale='ar', brand=EMBED_BRAND)
         
-        embed.add_field(
-            name="🌐 معلومات الاتصال",
-            value="**IP:** `18.228.228.44`\n**Port:** `3827`",
-            inline=True
-        )
-        
-        embed.add_field(
-            name="🏆 المكافأة",
-            value="الفائز يحصل على نقاط انتصار",
-            inline=True
-        )
-        
-        embed.set_footer(text="Clan Lords |Bombsquad • ليفز أفضل المقاتلين!")
-        
-        # Send to both players
+        # Queue for both players
         for player_id in [match['player1_id'], match['player2_id']]:
-            try:
-                player = await bot.fetch_user(int(player_id))
-                await player.send(embed=embed)
-                print(f"✅ إشعار بدء المبارزة أرسل إلى {player.display_name}")
-            except:
-                print(f"❌ فشل إرسال إشعار بدء المبارزة إلى {player_id}")
+            await dm_queue.send(int(player_id), label="duel start", embed=embed)
                 
     except Exception as e:
         logger.error(f"Error sending duel start notification: {e}")
@@ -257,13 +205,7 @@ async def send_duel_notification_dm(player1, player2, scheduled_time, match_id):
 
         embed.set_footer(text="Clan Lords |Bombsquad • حظاً موفقاً في المبارزة!")
         
-        try:
-            await player.send(embed=embed)
-            print(f"✅ دعوة المبارزة أرسلت إلى {player.display_name}")
-        except discord.Forbidden:
-            print(f"❌ لا يمكن إرسال رسالة خاصة إلى {player.display_name}")
-        except Exception as e:
-            print(f"❌ خطأ في إرسال الرسالة الخاصة إلى {player.display_name}: {e}")
+        await dm_queue.send(player, label="duel invitation", embed=embed)
 
 # 👥 Player Commands
 @bot.tree.command(name="register", description="Register new player")
@@ -290,6 +232,7 @@ async def register(interaction: discord.Interaction, name: str = None):
             'last_updated': datetime.now().isoformat()
         }
         save_data("players.json", players)
+        season_stats.update_player(str(user.id), players[str(user.id)])
         
         embed = discord.Embed(
             title="✅ Registration Successful!",
@@ -467,6 +410,7 @@ async def duel(interaction: discord.Interaction, player1: discord.Member, player
     
     matches[match_id] = match_data
     save_data("matches.json", matches)
+    reminder_scheduler.schedule_match(match_data)
     
     embed = discord.Embed(
         title="⚔️ DUEL CHALLENGE CREATED!",
@@ -543,11 +487,21 @@ async def record_result(interaction: discord.Interaction, match_id: str, winner:
         players[player2_id]['kills'] += player2_kills
         players[player2_id]['deaths'] += player1_kills
     
+    # Elo ratings: 1 for a player 1 win, 0.5 for a draw
+    score1 = 0.5 if not winner else 1.0 if str(winner.id) == player1_id else 0.0
+    players[player1_id]['rating'], players[player2_id]['rating'] = rate_match(
+        players[player1_id].get('rating', DEFAULT_RATING), players[player2_id].get('rating', DEFAULT_RATING), score1
+    )
+    
     players[player1_id]['last_updated'] = datetime.now().isoformat()
     players[player2_id]['last_updated'] = datetime.now().isoformat()
     
     save_data("matches.json", matches)
     save_data("players.json", players)
+    season_stats.update_match(match_id, match)
+    season_stats.update_player(player1_id, players[player1_id])
+    season_stats.update_player(player2_id, players[player2_id])
+    reminder_scheduler.cancel_match(match_id)
     
     # Create result embed
     if winner:
@@ -612,6 +566,7 @@ async def cancel_match(interaction: discord.Interaction, match_id: str):
     matches[match_id]['status'] = 'cancelled'
     matches[match_id]['cancelled_at'] = datetime.now().isoformat()
     save_data("matches.json", matches)
+    reminder_scheduler.cancel_match(match_id)
     
     embed = discord.Embed(
         title="❌ Match Cancelled",
@@ -843,24 +798,19 @@ async def leaderboard(interaction: discord.Interaction, stat: str = "wins"):
 
 @bot.tree.command(name="kill_stats", description="Kill statistics")
 async def kill_stats(interaction: discord.Interaction):
-    players = load_data("players.json")
+    stats = current_season_stats().summary()
     
-    if not players:
+    if not stats:
         embed = discord.Embed(title="⚔️ Kill Statistics", description="No players registered yet!", color=0xF04747)
         await interaction.response.send_message(embed=embed)
         return
     
-    # Calculate stats
-    total_kills = sum(p.get('kills', 0) for p in players.values())
-    total_deaths = sum(p.get('deaths', 0) for p in players.values())
-    total_matches = len([m for m in load_data("matches.json").values() if m['status'] == 'completed'])
-    
-    # Find top killer
-    top_killer = max(players.values(), key=lambda x: x.get('kills', 0))
-    
-    # Find best K/D
-    best_kd_player = max(players.values(), key=lambda x: (x.get('kills', 0) / x.get('deaths', 1)) if x.get('deaths', 0) > 0 else x.get('kills', 0))
-    best_kd = (best_kd_player.get('kills', 0) / best_kd_player.get('deaths', 1)) if best_kd_player.get('deaths', 0) > 0 else best_kd_player.get('kills', 0)
+    total_kills = stats['totals']['kills']
+    total_deaths = stats['totals']['deaths']
+    total_matches = stats['completed_matches']
+    top_killer = stats['top_killer']
+    best_kd_player = stats['best_kd']
+    kd_percentiles = stats['kd_percentiles']
     
     embed = discord.Embed(
         title="⚔️ Kill Statistics",
@@ -870,9 +820,10 @@ async def kill_stats(interaction: discord.Interaction):
     )
     
     embed.add_field(name="📊 Global Stats", value=f"**Total Kills:** {total_kills}\n**Total Deaths:** {total_deaths}\n**Total Matches:** {total_matches}", inline=True)
-    embed.add_field(name="🎯 Averages", value=f"**Kills/Match:** {total_kills/total_matches if total_matches > 0 else 0:.1f}\n**K/D Ratio:** {total_kills/total_deaths if total_deaths > 0 else 0:.2f}", inline=True)
-    embed.add_field(name="👑 Top Killer", value=f"**{top_killer['name']}**\n{top_killer.get('kills', 0)} kills", inline=True)
-    embed.add_field(name="🏆 Best K/D Ratio", value=f"**{best_kd_player['name']}**\n{best_kd:.2f} ratio", inline=True)
+    embed.add_field(name="🎯 Averages", value=f"**Kills/Match:** {stats['kills_per_match']:.1f}\n**K/D Ratio:** {stats['kd_ratio']:.2f}", inline=True)
+    embed.add_field(name="👑 Top Killer", value=f"**{top_killer['name']}**\n{top_killer['kills']} kills", inline=True)
+    embed.add_field(name="🏆 Best K/D Ratio", value=f"**{best_kd_player['name']}**\n{best_kd_player['kd_ratio']:.2f} ratio", inline=True)
+    embed.add_field(name="📈 K/D Spread", value=f"**Median:** {kd_percentiles[50]:.2f}\n**Top 10%:** {kd_percentiles[90]:.2f}+", inline=True)
     
     embed.set_footer(text="Clan Lords |Bombsquad Tournament Bot")
     
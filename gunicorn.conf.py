@@ -5,10 +5,18 @@ bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
 backlog = 2048
 
 # Worker processes
-workers = 1
-worker_class = "sync"
+# Threaded workers: a slow page or an open live feed stream (/api/events)
+# holds one thread, not the whole worker. Async workers (gevent, eventlet)
+# are not supported: the app is preloaded with the Discord bot thread and
+# the storage layer uses native threads and locks
+workers = int(os.environ.get('WEB_WORKERS', 1))
+worker_class = "gthread"
+threads = int(os.environ.get('WEB_THREADS', 32))
 worker_connections = 1000
-timeout = 30
+# gthread workers heartbeat from their main loop, so this bounds a hung
+# worker, not a slow request
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 10
 keepalive = 2
 max_requests = 1000
 max_requests_jitter = 100
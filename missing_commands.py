@@ -11,7 +11,7 @@ from datetime import datetime
 class MissingCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db
+        self.db = bot.async_db
 
     @app_commands.command(name="challenge", description="Challenge another player to a duel")
     @app_commands.describe(player="Player to challenge")
@@ -24,8 +24,8 @@ class MissingCommands(commands.Cog):
             return
             
         # Check if both players are registered
-        challenger_data = self.db.get_player(str(challenger.id))
-        player_data = self.db.get_player(str(player.id))
+        challenger_data = await self.db.get_player(str(challenger.id))
+        player_data = await self.db.get_player(str(player.id))
         
         if not challenger_data:
             await interaction.response.send_message("❌ You must register first using `/register`", ephemeral=True)
@@ -68,7 +68,7 @@ class MissingCommands(commands.Cog):
     @app_commands.describe(match_id="Match ID to accept")
     async def accept_match(self, interaction: discord.Interaction, match_id: str):
         """Accept a match challenge"""
-        match = self.db.get_match(match_id)
+        match = await self.db.get_match(match_id)
         
         if not match:
             await interaction.response.send_message(f"❌ No match found with ID `{match_id}`", ephemeral=True)
@@ -84,7 +84,7 @@ class MissingCommands(commands.Cog):
             return
         
         # Update match status
-        self.db.update_match_status(match_id, 'accepted')
+        await self.db.update_match_status(match_id, 'accepted')
         
         embed = discord.Embed(
             title="✅ Match Accepted!",
@@ -104,7 +104,7 @@ class MissingCommands(commands.Cog):
     @app_commands.describe(match_id="Match ID to decline")
     async def decline_match(self, interaction: discord.Interaction, match_id: str):
         """Decline a match challenge"""
-        match = self.db.get_match(match_id)
+        match = await self.db.get_match(match_id)
         
         if not match:
             await interaction.response.send_message(f"❌ No match found with ID `{match_id}`", ephemeral=True)
@@ -116,7 +116,7 @@ class MissingCommands(commands.Cog):
             return
         
         # Update match status
-        self.db.update_match_status(match_id, 'declined')
+        await self.db.update_match_status(match_id, 'declined')
         
         embed = discord.Embed(
             title="❌ Match Declined",
@@ -140,7 +140,7 @@ class MissingCommands(commands.Cog):
         loser: discord.Member
     ):
         """Report match result"""
-        match = self.db.get_match(match_id)
+        match = await self.db.get_match(match_id)
         
         if not match:
             await interaction.response.send_message(f"❌ No match found with ID `{match_id}`", ephemeral=True)
@@ -158,7 +158,7 @@ class MissingCommands(commands.Cog):
             return
         
         # Update player statistics
-        self.db.record_match_result(winner_id, loser_id, match_id)
+        await self.db.record_match_result(winner_id, loser_id, match_id)
         
         embed = discord.Embed(
             title="🏆 Match Result Recorded!",
@@ -187,7 +187,7 @@ class MissingCommands(commands.Cog):
     async def my_matches(self, interaction: discord.Interaction):
         """View user's matches"""
         user_id = str(interaction.user.id)
-        matches = self.db.get_player_matches(user_id)
+        matches = await self.db.get_player_matches(user_id)
         
         if not matches:
             await interaction.response.send_message("❌ You have no matches scheduled", ephemeral=True)
@@ -224,7 +224,7 @@ class MissingCommands(commands.Cog):
         
         if recent:
             recent_text = ""
-            for match in recent[:3]:
+            for match in reversed(recent[-3:]):
                 opponent_id = match['player2_id'] if match['player1_id'] == user_id else match['player1_id']
                 status = match['status']
                 recent_text += f"vs <@{opponent_id}> - {status.title()}\n"
@@ -242,7 +242,7 @@ class MissingCommands(commands.Cog):
     @app_commands.command(name="all_matches", description="View all recent matches")
     async def all_matches(self, interaction: discord.Interaction):
         """View all recent matches"""
-        matches = self.db.get_recent_matches(limit=10)
+        matches = await self.db.get_recent_matches(limit=10)
         
         if not matches:
             await interaction.response.send_message("❌ No recent matches found", ephemeral=True)
@@ -257,8 +257,8 @@ class MissingCommands(commands.Cog):
         
         matches_text = ""
         for i, match in enumerate(matches, 1):
-            player1_data = self.db.get_player(match['player1_id'])
-            player2_data = self.db.get_player(match['player2_id'])
+            player1_data = await self.db.get_player(match['player1_id'])
+            player2_data = await self.db.get_player(match['player2_id'])
             
             name1 = player1_data.get('name', 'Unknown') if player1_data else 'Unknown'
             name2 = player2_data.get('name', 'Unknown') if player2_data else 'Unknown'
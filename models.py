@@ -0,0 +1,218 @@
+"""
+Typed records for players, matches and tournaments
+An adapter layer only: both stores keep plain dicts, and these __slots__ records
+are built from them on the hot paths to settle field names and defaults.
+to_dict() writes back the keys the stored dict had, under their stored names,
+plus only the fields that were changed from their defaults
+"""
+
+from dataclasses import MISSING, dataclass, field, fields
+
+from utils.ratings import DEFAULT_RATING
+
+# Adapter bookkeeping, not stored fields
+_INTERNAL = ('extra', 'origin')
+
+def _field_defaults(cls):
+    """{name: default} of the stored fields of a record class, MISSING when required"""
+    defaults = cls.__dict__.get('_defaults')
+    if defaults is None:
+        defaults = {f.name: f.default for f in fields(cls) if f.name not in _INTERNAL}
+        # Cached on the class; slots only restrict instance attributes
+        type.__setattr__(cls, '_defaults', defaults)
+    return defaults
+
+def _from_dict(cls, data, aliases=None, **overrides):
+    """Build a record from a stored dict, keeping unknown keys in extra
+    
+    origin remembers every stored key, in order, with the field it filled
+    (None for extra keys), so to_dict() can write the same shape back.
+    """
+    values = {}
+    extra = {}
+    origin = {}
+    names = _field_defaults(cls)
+    for key, value in data.items():
+        if key in names:
+            values[key] = value
+            origin[key] = key
+        else:
+            extra[key] = value
+            origin[key] = None
+    
+    # Older code paths use different names for the same field
+    for name, alternatives in (aliases or {}).items():
+        if name in values:
+            continue
+        for alternative in alternatives:
+            if alternative in extra:
+                values[name] = extra.pop(alternative)
+                origin[alternative] = name
+                break
+    
+    values.update(overrides)
+    return cls(**values, extra=extra or None, origin=origin)
+
+def _to_dict(record):
+    defaults = _field_defaults(type(record))
+    extra = record.extra or {}
+    if record.origin is None:
+        # Built in code rather than loaded: every field is part of the record
+        data = {name: getattr(record, name) for name in defaults}
+        data.update(extra)
+        return data
+    
+    data = {}
+    for key, name in record.origin.items():
+        if name is not None:
+            data[key] = getattr(record, name)
+        elif key in extra:
+            data[key] = extra[key]
+    # Fields the stored dict lacked are only added once they were set
+    written = set(record.origin.values())
+    for name, default in defaults.items():
+        if name not in written and default is not MISSING and getattr(record, name) != default:
+            data[name] = getattr(record, name)
+    for key, value in extra.items():
+        data.setdefault(key, value)
+    return data
+
+@dataclass(slots=True)
+class Player:
+    user_id: str
+    name: str = ''
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    kills: int = 0
+    deaths: int = 0
+    rating: float = DEFAULT_RATING
+    registered_at: str | None = None
+    last_updated: str | None = None
+    extra: dict | None = None
+    origin: dict | None = field(default=None, compare=False, repr=False)
+    
+    @classmethod
+    def from_dict(cls, data, user_id=None):
+        """Build a Player from a stored dict; user_id fills in records keyed only by id"""
+        if user_id is not None and 'user_id' not in data:
+            return _from_dict(cls, data, user_id=str(user_id))
+        return _from_dict(cls, data)
+    
+    def to_dict(self):
+        return _to_dict(self)
+    
+    @property
+    def total_games(self):
+        return self.wins + self.losses + self.draws
+    
+    @property
+    def win_rate(self):
+        """Win rate in percent"""
+        return self.wins / self.total_games * 100 if self.total_games else 0
+    
+    @property
+    def kd_ratio(self):
+        return self.kills / self.deaths if self.deaths else self.kills
+
+@dataclass(slots=True)
+class Match:
+    id: str
+    player1_id: str | None = None
+    player2_id: str | None = None
+    scheduled_time: str | None = None
+    status: str = 'scheduled'
+    description: str | None = None
+    created_at: str | None = None
+    completed_at: str | None = None
+    winner_id: str | None = None
+    reminder_sent: bool = False
+    result: dict | None = None
+    channel_id: str | None = None
+    jobs: dict | None = None
+    extra: dict | None = None
+    origin: dict | None = field(default=None, compare=False, repr=False)
+    
+    # MatchManager used challenger/opponent, tournament brackets player1/player2
+    ALIASES = {
+        'player1_id': ('challenger_id', 'player1'),
+        'player2_id': ('opponent_id', 'player2'),
+    }
+    
+    @classmethod
+    def from_dict(cls, data, match_id=None):
+        """Build a Match from any of the stored match shapes"""
+        if match_id is not None and 'id' not in data:
+            return _from_dict(cls, data, cls.ALIASES, id=match_id)
+        return _from_dict(cls, data, cls.ALIASES)
+    
+    def to_dict(self):
+        return _to_dict(self)
+    
+    @property
+    def players(self):
+        return (self.player1_id, self.player2_id)
+    
+    def opponent_of(self, user_id):
+        """Get the other participant's id"""
+        return self.player2_id if str(user_id) == str(self.player1_id) else self.player1_id
+
+@dataclass(slots=True)
+class Tournament:
+    id: str
+    name: str = ''
+    description: str = ''
+    max_players: int = 16
+    creator_id: str | None = None
+    participants: list | None = None
+    status: str = 'registration'
+    created_at: str | None = None
+    started_at: str | None = None
+    completed_at: str | None = None
+    matches: list | None = None
+    extra: dict | None = None
+    origin: dict | None = field(default=None, compare=False, repr=False)
+    
+    @classmethod
+    def from_dict(cls, data, tournament_id=None):
+        if tournament_id is not None and 'id' not in data:
+            return _from_dict(cls, data, id=tournament_id)
+        return _from_dict(cls, data)
+    
+    def to_dict(self):
+        return _to_dict(self)
+    
+    @property
+    def bracket(self):
+        """Bracket entries as Match records"""
+        return [Match.from_dict(match, match_id=str(i)) for i, match in enumerate(self.matches or [], 1)]
+
+def job_fired(match, kind):
+    """Whether a match's 'reminder' or 'start' job already ran
+    
+    A job record only counts for the scheduled time it fired for, so
+    rescheduling a match re-arms its jobs.
+    """
+    job = (match.get('jobs') or {}).get(kind)
+    if job is not None:
+        return job.get('scheduled_time') == match.get('scheduled_time')
+    return kind == 'reminder' and bool(match.get('reminder_sent'))
+
+def mark_job_fired(match, kind, timestamp):
+    """Return a copy of match with the job recorded as fired"""
+    jobs = dict(match.get('jobs') or {})
+    jobs[kind] = {'scheduled_time': match.get('scheduled_time'), 'fired_at': timestamp}
+    match = dict(match, jobs=jobs)
+    if kind == 'reminder':
+        match['reminder_sent'] = True
+    return match
+
+
+# Leaderboard orderings: sort key of a Player per ranking, higher ranks first
+PLAYER_RANKINGS = {
+    'wins': lambda player: (player.wins, player.kills),
+    'kills': lambda player: (player.kills, player.kd_ratio),
+    'kd_ratio': lambda player: (player.kd_ratio, player.kills),
+    'win_rate': lambda player: (player.win_rate, player.wins),
+    'rating': lambda player: (player.rating, player.wins),
+}
@@ -0,0 +1,199 @@
+"""
+Compact binary snapshot format for the player/match/tournament collections
+
+A snapshot stores one collection column by column: every field name is
+written once, integer columns are packed as int64 arrays, string columns
+as NUL-separated UTF-8, and anything else (None, nested lists/dicts,
+mixed types) as a JSON list. A per-record bitmask records which fields the
+record has, so records with different keys survive a round trip unchanged.
+
+File layout (big endian): magic b"DLSNAP", format version (u8), payload
+length (u32), then the zlib-compressed payload. The payload starts with a
+u32 length and a JSON description of the columns, followed by the column
+data in the order described. The keys are a column too, with their encoding
+recorded in the description, so integer keys come back as integers.
+"""
+
+import array
+import gc
+import json
+import os
+import struct
+import sys
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DLSNAP"
+VERSION = 1
+HEADER = struct.Struct(">6sBI")
+META_LENGTH = struct.Struct(">I")
+
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+_MISSING = object()
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be decoded"""
+
+def _encode_column(values):
+    """Pick the most compact encoding for a column's values"""
+    if all(type(v) is int and INT_MIN <= v <= INT_MAX for v in values):
+        return 'i', array.array('q', values).tobytes()
+    if all(type(v) is str and '\x00' not in v for v in values):
+        return 's', '\x00'.join(values).encode('utf-8')
+    return 'j', json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _decode_column(kind, blob, count):
+    if kind == 'i':
+        values = array.array('q')
+        values.frombytes(blob)
+        return values.tolist()
+    if kind == 's':
+        return blob.decode('utf-8').split('\x00') if count else []
+    if kind == 'j':
+        return json.loads(blob)
+    raise SnapshotError(f"Unknown column encoding {kind!r}")
+
+def dumps(records):
+    """Encode a {key: record} collection as snapshot bytes"""
+    fields = []
+    field_index = {}
+    columns = []
+    masks = []
+    
+    for record in records.values():
+        mask = 0
+        for field, value in record.items():
+            i = field_index.get(field)
+            if i is None:
+                i = field_index[field] = len(fields)
+                fields.append(field)
+                columns.append([])
+            mask |= 1 << i
+            columns[i].append(value)
+        masks.append(mask)
+    
+    keys = list(records.keys())
+    keys_kind, keys_blob = _encode_column(keys)
+    meta = {
+        'count': len(keys),
+        'keys': keys_kind,
+        'fields': [],
+        # Masks fit an unsigned 64-bit array unless a collection has more fields
+        'masks': 'Q' if len(fields) <= 64 else 'j'
+    }
+    blobs = [keys_blob]
+    if meta['masks'] == 'Q':
+        blobs.append(array.array('Q', masks).tobytes())
+    else:
+        blobs.append(json.dumps(masks).encode('utf-8'))
+    meta['lengths'] = [len(blobs[0]), len(blobs[1])]
+    
+    for field, values in zip(fields, columns):
+        kind, blob = _encode_column(values)
+        meta['fields'].append([field, kind, len(values), len(blob)])
+        blobs.append(blob)
+    
+    meta_blob = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    payload = zlib.compress(META_LENGTH.pack(len(meta_blob)) + meta_blob + b''.join(blobs), 1)
+    return HEADER.pack(MAGIC, VERSION, len(payload)) + payload
+
+def loads(blob):
+    """Decode snapshot bytes into a {key: record} collection"""
+    if len(blob) < HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    
+    magic, version, length = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise SnapshotError("Not a snapshot file")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    
+    payload = blob[HEADER.size:HEADER.size + length]
+    if len(payload) != length:
+        raise SnapshotError("Snapshot is truncated")
+    
+    try:
+        payload = zlib.decompress(payload)
+        meta_length, = META_LENGTH.unpack_from(payload)
+        position = META_LENGTH.size + meta_length
+        meta = json.loads(payload[META_LENGTH.size:position])
+        
+        count = meta['count']
+        keys_length, masks_length = meta['lengths']
+        # Snapshots written before the key encoding was recorded only have string keys
+        keys = _decode_column(meta.get('keys', 's'), payload[position:position + keys_length], count)
+        position += keys_length
+        mask_blob = payload[position:position + masks_length]
+        position += masks_length
+        if meta['masks'] == 'Q':
+            masks = array.array('Q')
+            masks.frombytes(mask_blob)
+        else:
+            masks = json.loads(mask_blob)
+        
+        fields = []
+        columns = []
+        for i, (field, kind, value_count, blob_length) in enumerate(meta['fields']):
+            values = _decode_column(kind, payload[position:position + blob_length], value_count)
+            position += blob_length
+            if len(values) != value_count:
+                raise SnapshotError(f"Column {field!r} is corrupt")
+            if value_count != count:
+                # Sparse column: pad records that lack the field
+                present = iter(values)
+                values = [next(present) if mask >> i & 1 else _MISSING for mask in masks]
+            fields.append(field)
+            columns.append(values)
+    except (zlib.error, struct.error, ValueError, KeyError, StopIteration) as e:
+        raise SnapshotError(f"Corrupt snapshot: {e}")
+    
+    if len(keys) != count:
+        raise SnapshotError("Snapshot key column is corrupt")
+    
+    # Building many small dicts triggers needless cyclic GC passes
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rows = [dict(zip(fields, values)) for values in zip(*columns)] if columns else [{} for _ in keys]
+        full_mask = (1 << len(fields)) - 1
+        for row, mask in zip(rows, masks):
+            if mask != full_mask:
+                for field in [f for f, v in row.items() if v is _MISSING]:
+                    del row[field]
+        return dict(zip(keys, rows))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def snapshot_path(json_path):
+    """Get the snapshot file that replaces a JSON collection file"""
+    return os.path.splitext(json_path)[0] + '.snap'
+
+def convert_json_file(json_path):
+    """Write a snapshot next to a JSON collection file and return its path"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    
+    path = snapshot_path(json_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(dumps(records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    
+    logger.info(f"Converted {json_path} ({os.path.getsize(json_path)} bytes) "
+                f"to {path} ({os.path.getsize(path)} bytes)")
+    return path
+
+if __name__ == "__main__":
+    # Convert the JSON store: python snapshot.py [data_dir]
+    logging.basicConfig(level=logging.INFO)
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    for name in ("players", "matches", "tournaments"):
+        json_path = os.path.join(data_dir, f"{name}.json")
+        if os.path.exists(json_path):
+            convert_json_file(json_path)
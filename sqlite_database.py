@@ -0,0 +1,688 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+from database import PlayerRankIndex
+from models import PLAYER_RANKINGS, Match, job_fired, mark_job_fired
+from utils.ratings import DEFAULT_RATING, match_score, rate_match, replay
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    user_id TEXT PRIMARY KEY,
+    name TEXT,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY,
+    player1_id TEXT,
+    player2_id TEXT,
+    status TEXT,
+    scheduled_time TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_matches_status ON matches (status, scheduled_time);
+CREATE INDEX IF NOT EXISTS idx_matches_scheduled_time ON matches (scheduled_time);
+CREATE INDEX IF NOT EXISTS idx_matches_player1 ON matches (player1_id);
+CREATE INDEX IF NOT EXISTS idx_matches_player2 ON matches (player2_id);
+CREATE INDEX IF NOT EXISTS idx_matches_created ON matches (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_matches_status_created ON matches (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments (status);
+CREATE INDEX IF NOT EXISTS idx_players_rank_wins ON players (wins DESC, kills DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_players_rank_kills ON players (kills DESC, {kd} DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_players_rank_kd_ratio ON players ({kd} DESC, kills DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_players_rank_win_rate ON players ({win_rate} DESC, wins DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_players_rank_rating ON players ({rating} DESC, wins DESC, user_id);
+"""
+
+# SQL versions of the PLAYER_RANKINGS sort keys; the expressions must match
+# the index definitions above for SQLite to use them
+KD_RATIO_SQL = "(CASE WHEN deaths > 0 THEN CAST(kills AS REAL) / deaths ELSE kills END)"
+WIN_RATE_SQL = ("(CASE WHEN wins + losses + draws > 0 "
+                "THEN CAST(wins AS REAL) / (wins + losses + draws) * 100 ELSE 0 END)")
+RATING_SQL = f"COALESCE(json_extract(data, '$.rating'), {DEFAULT_RATING})"
+RANKING_COLUMNS = {
+    'wins': ("wins", "kills"),
+    'kills': ("kills", KD_RATIO_SQL),
+    'kd_ratio': (KD_RATIO_SQL, "kills"),
+    'win_rate': (WIN_RATE_SQL, "wins"),
+    'rating': (RATING_SQL, "wins"),
+}
+SCHEMA = SCHEMA.format(kd=KD_RATIO_SQL, win_rate=WIN_RATE_SQL, rating=RATING_SQL)
+
+def _ranked_player(row):
+    # Records imported from older JSON stores may lack user_id; the row key is authoritative
+    player = json.loads(row['data'])
+    player['user_id'] = row['user_id']
+    return player
+
+class SqliteDatabase:
+    """SQLite implementation of the Database interface
+    
+    Records are stored as JSON in a data column, with the fields used for
+    lookups and sorting copied into indexed columns.
+    """
+    
+    def __init__(self, db_path=None):
+        self.data_dir = "data"
+        self.ensure_data_directory()
+        self.db_path = db_path or os.environ.get('DATABASE_PATH', os.path.join(self.data_dir, "duel_lords.db"))
+        
+        # Readers get a connection per thread. Every write goes through the one
+        # writer connection under _write_lock, so its PRAGMA data_version only
+        # moves when another process commits
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._listeners = []
+        # Data version, moved by every change; see data_version()
+        self._versions = itertools.count(1)
+        self.version = 0
+        # Leaderboard ranks, built on the first rank query; see _player_ranks()
+        self.player_ranks = None
+        self._ranks_data_version = None
+        
+        # Connections belong to the process that opened them; see _check_fork()
+        self._pid = os.getpid()
+        self._fork_lock = threading.Lock()
+        self._inherited = []
+        
+        is_new = not os.path.exists(self.db_path)
+        self._writer = self._connect(check_same_thread=False)
+        self._writer.executescript(SCHEMA)
+        
+        # One-shot import of the JSON store the first time the database is created
+        if is_new:
+            self.migrate_from_json(self.data_dir)
+        self._data_version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _check_fork(self):
+        """Give a forked process (a preloaded gunicorn worker) connections of its own
+        
+        SQLite connections must not be used across fork(). The inherited
+        handles are kept referenced but never touched: closing them could
+        checkpoint or unlock the parent's database state. Locks are replaced
+        too, since one may have been held by a thread that did not survive
+        the fork.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._fork_lock:
+            if self._pid == os.getpid():
+                return
+            self._inherited.append((self._writer, self._local))
+            self._local = threading.local()
+            self._write_lock = threading.RLock()
+            self._writer = self._connect(check_same_thread=False)
+            self._data_version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+            self._ranks_data_version = None
+            self._pid = os.getpid()
+    
+    def ensure_data_directory(self):
+        """Ensure data directory exists"""
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+    
+    def _connect(self, check_same_thread=True):
+        # Autocommit mode; write transactions are opened explicitly
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                               check_same_thread=check_same_thread)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def connection(self):
+        """Get the connection for the current thread, the writer inside a write transaction"""
+        self._check_fork()
+        if getattr(self._local, 'depth', 0):
+            return self._writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+    
+    @contextmanager
+    def write_transaction(self):
+        """Run a read-modify-write under BEGIN IMMEDIATE so other writers wait"""
+        self._check_fork()
+        with self._write_lock:
+            conn = self._writer
+            depth = getattr(self._local, 'depth', 0)
+            if depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+                self._local.changes = []
+            self._local.depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    conn.execute("ROLLBACK")
+                    self._local.changes = []
+                raise
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("COMMIT")
+                self.version = next(self._versions)
+                changes, self._local.changes = self._local.changes, []
+                for collection, key, record in changes:
+                    if collection == 'players' and self.player_ranks is not None:
+                        self.player_ranks.update(key, record)
+                    self.notify_listeners(collection, key, record)
+    
+    @contextmanager
+    def transaction(self):
+        """Group several changes into one SQLite transaction"""
+        with self.write_transaction():
+            yield self
+    
+    # Change notification
+    def add_change_listener(self, callback):
+        """Register callback(collection, key, record), called after each commit
+        
+        Only changes made through this process are reported individually;
+        check_for_changes() reports other processes' commits.
+        """
+        self._listeners.append(callback)
+    
+    def notify_listeners(self, collection, key, record):
+        self.version = next(self._versions)
+        for callback in self._listeners:
+            try:
+                callback(collection, key, record)
+            except Exception as e:
+                logger.error(f"Error in change listener: {e}")
+    
+    def check_for_changes(self):
+        """Report commits made by other processes as whole-collection reloads
+        
+        The writer's PRAGMA data_version ignores its own commits, so it only
+        changes when another process wrote. An unchanged database costs one
+        pragma per call.
+        """
+        self._check_fork()
+        with self._write_lock:
+            version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return
+            self._data_version = version
+            for collection in ("players", "matches", "tournaments"):
+                self.notify_listeners(collection, None, None)
+    
+    def data_version(self):
+        """A number that changes whenever any table changes, other processes' writes included
+        
+        Anything derived from the data can be cached under it. Costs one pragma.
+        """
+        self.check_for_changes()
+        return self.version
+    
+    def _record_change(self, collection, key, record):
+        if self._listeners or (collection == 'players' and self.player_ranks is not None):
+            self._local.changes.append((collection, key, record))
+    
+    def migrate_from_json(self, data_dir="data"):
+        """Import players, matches and tournaments from the JSON files"""
+        counts = {}
+        with self.write_transaction() as conn:
+            for name, save in (("players", self._save_player),
+                               ("matches", self._save_match),
+                               ("tournaments", self._save_tournament)):
+                file_path = os.path.join(data_dir, f"{name}.json")
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        records = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    records = {}
+                
+                for key, record in records.items():
+                    save(conn, key, record)
+                counts[name] = len(records)
+        
+        logger.info(f"Migrated JSON data into {self.db_path}: {counts}")
+        return counts
+    
+    def get_current_timestamp(self):
+        """Get current timestamp in ISO format"""
+        return datetime.now().isoformat()
+    
+    def generate_id(self):
+        """Generate a unique ID"""
+        return str(uuid.uuid4())[:8]
+    
+    # Row helpers
+    def _save_player(self, conn, user_id, player):
+        conn.execute(
+            "INSERT OR REPLACE INTO players (user_id, name, wins, losses, draws, kills, deaths, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, player.get('name'), player.get('wins', 0), player.get('losses', 0),
+             player.get('draws', 0), player.get('kills', 0), player.get('deaths', 0),
+             json.dumps(player, ensure_ascii=False))
+        )
+        self._record_change('players', user_id, player)
+    
+    def _save_match(self, conn, match_id, match):
+        conn.execute(
+            "INSERT OR REPLACE INTO matches (id, player1_id, player2_id, status, scheduled_time, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (match_id, match.get('player1_id'), match.get('player2_id'), match.get('status'),
+             match.get('scheduled_time'), match.get('created_at'),
+             json.dumps(match, ensure_ascii=False))
+        )
+        self._record_change('matches', match_id, match)
+    
+    def _save_tournament(self, conn, tournament_id, tournament):
+        conn.execute(
+            "INSERT OR REPLACE INTO tournaments (id, status, created_at, data) VALUES (?, ?, ?, ?)",
+            (tournament_id, tournament.get('status'), tournament.get('created_at'),
+             json.dumps(tournament, ensure_ascii=False))
+        )
+        self._record_change('tournaments', tournament_id, tournament)
+    
+    def _fetch_one(self, query, params):
+        row = self.connection().execute(query, params).fetchone()
+        return json.loads(row['data']) if row else None
+    
+    def _fetch_map(self, query, params=()):
+        rows = self.connection().execute(query, params).fetchall()
+        return {row[0]: json.loads(row['data']) for row in rows}
+    
+    # Player methods
+    def register_player(self, user_id, name):
+        """Register a new player"""
+        player_data = {
+            'user_id': user_id,
+            'name': name,
+            'wins': 0,
+            'losses': 0,
+            'draws': 0,
+            'kills': 0,
+            'deaths': 0,
+            'registered_at': self.get_current_timestamp(),
+            'last_updated': self.get_current_timestamp()
+        }
+        
+        with self.write_transaction() as conn:
+            if conn.execute("SELECT 1 FROM players WHERE user_id = ?", (user_id,)).fetchone():
+                return False
+            self._save_player(conn, user_id, player_data)
+        return True
+    
+    def get_player(self, user_id):
+        """Get player data"""
+        return self._fetch_one("SELECT data FROM players WHERE user_id = ?", (user_id,))
+    
+    def get_all_players(self):
+        """Get all players"""
+        return self._fetch_map("SELECT user_id, data FROM players")
+    
+    def get_top_players(self, ranking='wins', limit=10, offset=0):
+        """Players in leaderboard order for a ranking in PLAYER_RANKINGS; limit None returns all"""
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        order = ", ".join(f"{column} DESC" for column in RANKING_COLUMNS[ranking])
+        rows = self.connection().execute(
+            f"SELECT user_id, data FROM players ORDER BY {order}, user_id LIMIT ? OFFSET ?",
+            (limit if limit is not None else -1, offset)
+        ).fetchall()
+        return [_ranked_player(row) for row in rows]
+    
+    def get_players_page(self, ranking='wins', limit=50, after=None):
+        """One page of players in leaderboard order, and the key to pass as after for the next
+        
+        Keys are (score, user_id) with score the PLAYER_RANKINGS tuple, so a
+        page continues after the last player shown even if players were
+        added or re-ranked in between. The next key is None on the last page.
+        """
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        columns = RANKING_COLUMNS[ranking]
+        listed = ", ".join(columns)
+        order = ", ".join(f"{column} DESC" for column in columns)
+        where, params = "", ()
+        if after is not None:
+            score, user_id = after
+            marks = ", ".join('?' * len(score))
+            # Scores sort descending and user ids ascending, so the key cannot
+            # be one row-value comparison; the leading bound seeks into the index
+            where = (f"WHERE {columns[0]} <= ? AND "
+                     f"(({listed}) < ({marks}) OR (({listed}) = ({marks}) AND user_id > ?))")
+            params = (score[0], *score, *score, user_id)
+        rows = self.connection().execute(
+            f"SELECT user_id, data, {listed} FROM players {where} ORDER BY {order}, user_id LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        page = [_ranked_player(row) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        last = rows[limit - 1]
+        return page, (tuple(last)[2:], last['user_id'])
+    
+    def get_player_count(self):
+        """Number of registered players"""
+        return self.connection().execute("SELECT COUNT(*) FROM players").fetchone()[0]
+    
+    def get_player_standing(self, user_id):
+        """Rank, player count and top percentage of a player in every ranking, or None"""
+        self._check_fork()
+        with self._write_lock:
+            ranks = self._player_ranks()
+            total = len(ranks)
+            standing = {}
+            for ranking in PLAYER_RANKINGS:
+                rank = ranks.rank(str(user_id), ranking)
+                if rank is None:
+                    return None
+                standing[ranking] = {'rank': rank, 'total': total, 'top_percent': rank / total * 100}
+            return standing
+    
+    def get_player_rank(self, user_id, ranking='wins'):
+        """Leaderboard position of a player (1 is best), or None if not registered"""
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown ranking: {ranking}")
+        self._check_fork()
+        with self._write_lock:
+            return self._player_ranks().rank(str(user_id), ranking)
+    
+    def _player_ranks(self):
+        # SQLite indexes keep no subtree counts, so a rank would be a COUNT(*)
+        # over every better player; ranks come from the same in-memory index as
+        # the JSON store instead. This process's commits update it in place;
+        # another process's commit moves the writer's PRAGMA data_version and
+        # the index is rebuilt on the next rank query. Call under _write_lock.
+        version = self._writer.execute("PRAGMA data_version").fetchone()[0]
+        if self.player_ranks is None or version != self._ranks_data_version:
+            rows = self._writer.execute("SELECT user_id, data FROM players").fetchall()
+            self.player_ranks = PlayerRankIndex()
+            self.player_ranks.rebuild({row['user_id']: json.loads(row['data']) for row in rows})
+            self._ranks_data_version = version
+        return self.player_ranks
+    
+    def update_player_stats(self, user_id, wins=0, losses=0, draws=0, kills=0, deaths=0):
+        """Update player statistics"""
+        user_id = str(user_id)
+        with self.write_transaction() as conn:
+            row = conn.execute("SELECT data FROM players WHERE user_id = ?", (user_id,)).fetchone()
+            if not row:
+                return False
+            
+            player = json.loads(row['data'])
+            player['wins'] += wins
+            player['losses'] += losses
+            player['draws'] += draws
+            player['kills'] += kills
+            player['deaths'] += deaths
+            player['last_updated'] = self.get_current_timestamp()
+            self._save_player(conn, user_id, player)
+        return True
+    
+    def update_ratings(self, player1_id, player2_id, score1):
+        """Apply one result to both players' Elo ratings (score1: 1 win, 0.5 draw, 0 loss)"""
+        player1_id, player2_id = str(player1_id), str(player2_id)
+        with self.write_transaction() as conn:
+            rows = dict(conn.execute(
+                "SELECT user_id, data FROM players WHERE user_id IN (?, ?)", (player1_id, player2_id)
+            ).fetchall())
+            if player1_id not in rows or player2_id not in rows:
+                return False
+            
+            player1 = json.loads(rows[player1_id])
+            player2 = json.loads(rows[player2_id])
+            player1['rating'], player2['rating'] = rate_match(
+                player1.get('rating', DEFAULT_RATING), player2.get('rating', DEFAULT_RATING), score1
+            )
+            self._save_player(conn, player1_id, player1)
+            self._save_player(conn, player2_id, player2)
+        return True
+    
+    def recompute_ratings(self):
+        """Replay every completed match in order and store the resulting ratings"""
+        with self.write_transaction() as conn:
+            matches = self._fetch_map("SELECT id, data FROM matches WHERE status = 'completed'")
+            records = sorted(
+                (Match.from_dict(match, match_id=match_id) for match_id, match in matches.items()),
+                key=lambda match: match.completed_at or match.created_at or ''
+            )
+            ratings = replay(result for result in map(match_score, records) if result)
+            
+            changed = 0
+            for user_id, player in self._fetch_map("SELECT user_id, data FROM players").items():
+                rating = ratings.get(user_id, DEFAULT_RATING)
+                if player.get('rating') != rating:
+                    player['rating'] = rating
+                    self._save_player(conn, user_id, player)
+                    changed += 1
+        logger.info(f"Recomputed ratings for {changed} players")
+        return changed
+    
+    def update_player(self, user_id, player_data):
+        """Replace a player's data"""
+        with self.write_transaction() as conn:
+            self._save_player(conn, user_id, player_data)
+        return player_data
+    
+    # Match methods
+    def create_match(self, challenger_id, opponent_id, scheduled_time, description="Duel Match"):
+        """Create a new match"""
+        match_id = self.generate_id()
+        match_data = {
+            'id': match_id,
+            'player1_id': challenger_id,
+            'player2_id': opponent_id,
+            'scheduled_time': scheduled_time,
+            'description': description,
+            'status': 'scheduled',
+            'created_at': self.get_current_timestamp(),
+            'completed_at': None,
+            'winner_id': None,
+            'reminder_sent': False,
+            'result': None
+        }
+        
+        with self.write_transaction() as conn:
+            self._save_match(conn, match_id, match_data)
+        return match_id
+    
+    def get_upcoming_matches(self):
+        """Get all upcoming scheduled matches"""
+        rows = self.connection().execute(
+            "SELECT id, data FROM matches WHERE status = 'scheduled' ORDER BY scheduled_time"
+        ).fetchall()
+        return [dict(json.loads(row['data']), id=row['id']) for row in rows]
+    
+    def _modify_match(self, match_id, changes):
+        """Apply field changes to a stored match"""
+        with self.write_transaction() as conn:
+            row = conn.execute("SELECT data FROM matches WHERE id = ?", (match_id,)).fetchone()
+            if not row:
+                return False
+            match = json.loads(row['data'])
+            match.update(changes)
+            self._save_match(conn, match_id, match)
+        return True
+    
+    def update_match_reminder_status(self, match_id, sent):
+        """Update reminder sent status for a match"""
+        return self._modify_match(match_id, {'reminder_sent': sent})
+    
+    def claim_match_job(self, match_id, kind):
+        """Record that a scheduled 'reminder' or 'start' job is firing"""
+        with self.write_transaction() as conn:
+            row = conn.execute("SELECT data FROM matches WHERE id = ?", (match_id,)).fetchone()
+            if not row:
+                return False
+            match = json.loads(row['data'])
+            if match.get('status') != 'scheduled' or job_fired(match, kind):
+                return False
+            self._save_match(conn, match_id, mark_job_fired(match, kind, self.get_current_timestamp()))
+        return True
+    
+    def update_match_status(self, match_id, status):
+        """Update match status"""
+        return self._modify_match(match_id, {
+            'status': status,
+            'last_updated': self.get_current_timestamp()
+        })
+    
+    def record_match_result(self, match_id, result_data):
+        """Record the result of a completed match"""
+        return self._modify_match(match_id, {
+            'result': result_data,
+            'status': 'completed',
+            'completed_at': self.get_current_timestamp(),
+            'winner_id': result_data.get('winner_id')
+        })
+    
+    def cancel_match(self, match_id):
+        """Cancel a scheduled match"""
+        return self._modify_match(match_id, {
+            'status': 'cancelled',
+            'cancelled_at': self.get_current_timestamp()
+        })
+    
+    def get_match(self, match_id):
+        """Get match by ID"""
+        return self._fetch_one("SELECT data FROM matches WHERE id = ?", (match_id,))
+    
+    def update_match(self, match_id, match_data):
+        """Update match data"""
+        with self.write_transaction() as conn:
+            self._save_match(conn, match_id, match_data)
+        return match_data
+    
+    def get_all_matches(self):
+        """Get all matches"""
+        return self._fetch_map("SELECT id, data FROM matches")
+    
+    def get_match_status_counts(self):
+        """Count matches per status"""
+        rows = self.connection().execute(
+            "SELECT status, COUNT(*) FROM matches GROUP BY status"
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+    
+    def get_matches_by_status(self, status):
+        """Get all matches with the given status"""
+        rows = self.connection().execute("SELECT data FROM matches WHERE status = ?", (status,)).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def get_player_matches(self, user_id):
+        """Get all matches a player takes part in, soonest scheduled first"""
+        rows = self.connection().execute(
+            "SELECT data, scheduled_time FROM matches WHERE player1_id = ? "
+            "UNION ALL SELECT data, scheduled_time FROM matches WHERE player2_id = ? AND player1_id IS NOT ? "
+            "ORDER BY scheduled_time",
+            (str(user_id), str(user_id), str(user_id))
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def get_recent_matches(self, limit=10):
+        """Get the most recently created matches, newest first"""
+        rows = self.connection().execute(
+            "SELECT data FROM matches ORDER BY created_at DESC, id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def get_matches_page(self, limit=50, before=None, status=None, player_id=None):
+        """One page of matches, newest first, and the key to pass as before for the next
+        
+        Keys are (created_at, id). Optionally only matches with a status or
+        involving a player. The next key is None on the last page.
+        """
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if before is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(before)
+        
+        if player_id is not None:
+            # One index lookup per player column, like get_player_matches
+            player_id = str(player_id)
+            filters = "".join(f" AND {condition}" for condition in conditions)
+            query = (f"SELECT id, created_at, data FROM matches WHERE player1_id = ?{filters} "
+                     f"UNION ALL SELECT id, created_at, data FROM matches "
+                     f"WHERE player2_id = ? AND player1_id IS NOT ?{filters}")
+            params = [player_id, *params, player_id, player_id, *params]
+        else:
+            query = "SELECT id, created_at, data FROM matches"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+        
+        rows = self.connection().execute(
+            f"{query} ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+        page = [json.loads(row['data']) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        last = rows[limit - 1]
+        return page, (last['created_at'], last['id'])
+    
+    # Tournament methods
+    def create_tournament(self, name, description, max_players, creator_id):
+        """Create a new tournament"""
+        tournament_id = self.generate_id()
+        tournament_data = {
+            'id': tournament_id,
+            'name': name,
+            'description': description,
+            'max_players': max_players,
+            'creator_id': creator_id,
+            'participants': [],
+            'status': 'registration',
+            'created_at': self.get_current_timestamp(),
+            'started_at': None,
+            'completed_at': None,
+            'matches': []
+        }
+        
+        with self.write_transaction() as conn:
+            self._save_tournament(conn, tournament_id, tournament_data)
+        return tournament_id
+    
+    def get_tournament(self, tournament_id):
+        """Get tournament by ID"""
+        return self._fetch_one("SELECT data FROM tournaments WHERE id = ?", (tournament_id,))
+    
+    def update_tournament(self, tournament_id, tournament_data):
+        """Update tournament data"""
+        with self.write_transaction() as conn:
+            self._save_tournament(conn, tournament_id, tournament_data)
+        return tournament_data
+    
+    def get_all_tournaments(self):
+        """Get all tournaments"""
+        return self._fetch_map("SELECT id, data FROM tournaments")
+    
+    def get_tournament_status_counts(self):
+        """Count tournaments per status"""
+        rows = self.connection().execute(
+            "SELECT status, COUNT(*) FROM tournaments GROUP BY status"
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+if __name__ == "__main__":
+    # Re-run the JSON import into an existing database
+    logging.basicConfig(level=logging.INFO)
+    SqliteDatabase().migrate_from_json()
@@ -1,8 +1,9 @@
 // Dashboard JavaScript for BombSquad Tournament Bot
 class TournamentDashboard {
     constructor() {
-        this.refreshInterval = 30000; // 30 seconds
+        this.refreshInterval = 30000; // 30 seconds, only when live updates are unavailable
         this.autoRefreshTimer = null;
+        this.eventSource = null;
         this.lastUpdateTime = new Date();
         this.isRefreshing = false;
         
@@ -264,6 +265,46 @@ class TournamentDashboard {
     }
     
     startAutoRefresh() {
+        if (this.eventSource || this.autoRefreshTimer) {
+            return;
+        }
+        
+        // Only pages that show live data (data-live-feed on <body>) hold a stream
+        if (!document.body.hasAttribute('data-live-feed')) {
+            return;
+        }
+        
+        // Live updates pushed by the server; one connection instead of polling
+        if (typeof EventSource !== 'undefined') {
+            this.eventSource = new EventSource('/api/events');
+            
+            this.eventSource.addEventListener('stats', (event) => {
+                this.updateStatistics(JSON.parse(event.data));
+                this.updateLastUpdateTime();
+            });
+            
+            ['result', 'bracket', 'board'].forEach(type => {
+                this.eventSource.addEventListener(type, (event) => {
+                    document.dispatchEvent(new CustomEvent(`live:${type}`, { detail: JSON.parse(event.data) }));
+                });
+            });
+            
+            this.eventSource.onerror = () => {
+                // The browser reconnects by itself unless the server refused the stream
+                if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                    this.eventSource = null;
+                    this.startPolling();
+                }
+            };
+            
+            console.log('Live updates connected');
+            return;
+        }
+        
+        this.startPolling();
+    }
+    
+    startPolling() {
         this.autoRefreshTimer = setInterval(() => {
             this.refreshData();
         }, this.refreshInterval);
@@ -272,6 +313,12 @@ class TournamentDashboard {
     }
     
     stopAutoRefresh() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+            console.log('Live updates disconnected');
+        }
+        
         if (this.autoRefreshTimer) {
             clearInterval(this.autoRefreshTimer);
             this.autoRefreshTimer = null;
@@ -489,9 +536,8 @@ document.addEventListener('visibilitychange', function() {
         if (document.hidden) {
             window.tournamentDashboard.stopAutoRefresh();
         } else {
+            // The live stream starts with the current statistics
             window.tournamentDashboard.startAutoRefresh();
-            // Refresh immediately when page becomes visible
-            window.tournamentDashboard.refreshData();
         }
     }
 });
@@ -0,0 +1,29 @@
+"""Recent match queries on both storage backends"""
+
+import json
+
+import pytest
+
+from database import Database
+from sqlite_database import SqliteDatabase
+
+# Matches created in the same second, as a batch of tournament pairings is
+MATCHES = {
+    match_id: {'id': match_id, 'status': 'scheduled', 'created_at': created_at}
+    for match_id, created_at in [('b', '2026-01-01T10:00:00'), ('c', '2026-01-01T10:00:00'),
+                                 ('a', '2026-01-01T10:00:00'), ('d', '2026-01-01T09:00:00')]
+}
+
+@pytest.fixture(params=[Database, SqliteDatabase])
+def db(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'matches.json').write_text(json.dumps(MATCHES))
+    return request.param()
+
+def test_recent_matches_break_ties_by_id(db):
+    assert [match['id'] for match in db.get_recent_matches(4)] == ['c', 'b', 'a', 'd']
+
+def test_recent_matches_agree_with_the_first_page(db):
+    page, _ = db.get_matches_page(limit=3)
+    assert [match['id'] for match in page] == [match['id'] for match in db.get_recent_matches(3)]
@@ -0,0 +1,25 @@
+"""Record adapters write back the shape they were loaded from"""
+
+from models import Match, Player
+
+def test_unchanged_player_round_trips():
+    stored = {'name': 'old', 'wins': 3, 'kills': 5, 'discord_tag': 'old#1'}
+    assert Player.from_dict(stored, user_id='111').to_dict() == stored
+
+def test_player_gains_only_the_fields_that_changed():
+    player = Player.from_dict({'name': 'old', 'wins': 3}, user_id='111')
+    player.losses += 1
+    assert player.to_dict() == {'name': 'old', 'wins': 3, 'losses': 1}
+
+def test_match_keeps_its_stored_key_names():
+    stored = {'id': 'm1', 'challenger_id': '1', 'opponent_id': '2', 'status': 'accepted'}
+    match = Match.from_dict(stored)
+    assert match.players == ('1', '2')
+    match.status = 'completed'
+    match.winner_id = '1'
+    assert match.to_dict() == dict(stored, status='completed', winner_id='1')
+
+def test_new_record_writes_every_field():
+    data = Player(user_id='111', name='new').to_dict()
+    assert data['user_id'] == '111'
+    assert data['wins'] == 0
@@ -0,0 +1,54 @@
+"""Leaderboard reads from both storage backends"""
+
+import json
+
+import pytest
+
+from database import Database
+from sqlite_database import SqliteDatabase
+
+PLAYERS = {
+    # Written by full_bot.py /register, which stores no user_id
+    '111': {'name': 'old', 'wins': 3, 'losses': 0, 'draws': 0, 'kills': 5, 'deaths': 1},
+    '222': {'user_id': '222', 'name': 'new', 'wins': 1, 'losses': 0, 'draws': 0, 'kills': 0, 'deaths': 0},
+}
+
+@pytest.fixture(params=[Database, SqliteDatabase])
+def db(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'players.json').write_text(json.dumps(PLAYERS))
+    return request.param()
+
+def test_top_players_carry_the_storage_key(db):
+    assert [player['user_id'] for player in db.get_top_players('wins', 10)] == ['111', '222']
+
+def test_players_page_carries_the_storage_key(db):
+    page, after = db.get_players_page('wins', 1)
+    assert [player['user_id'] for player in page] == ['111']
+    page, after = db.get_players_page('wins', 1, after)
+    assert [player['user_id'] for player in page] == ['222']
+    assert after is None
+
+def test_ranks_follow_stats_updates(db):
+    assert db.get_player_rank('111', 'wins') == 1
+    db.update_player_stats('222', wins=5)
+    assert db.get_player_rank('222', 'wins') == 1
+    assert db.get_player_rank('111', 'wins') == 2
+    assert db.get_player_standing('111')['wins'] == {'rank': 2, 'total': 2, 'top_percent': 100.0}
+    assert db.get_player_rank('999', 'wins') is None
+
+def test_equal_scores_share_a_rank(db):
+    db.update_player_stats('222', wins=2, kills=5)
+    assert db.get_player_rank('111', 'wins') == 1
+    assert db.get_player_rank('222', 'wins') == 1
+
+def test_sqlite_ranks_see_other_connections_writes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'players.json').write_text(json.dumps(PLAYERS))
+    db = SqliteDatabase()
+    assert db.get_player_rank('222', 'wins') == 2
+    # Stands in for the bot process writing to the same file
+    SqliteDatabase().update_player_stats('222', wins=5)
+    assert db.get_player_rank('222', 'wins') == 1
@@ -0,0 +1,33 @@
+"""IndexedSkipList against a plain sorted list"""
+
+import bisect
+import random
+
+from utils.skiplist import IndexedSkipList
+
+def test_matches_a_sorted_list():
+    rng = random.Random(7)
+    initial = rng.sample(range(1000), 200)
+    skiplist = IndexedSkipList(initial)
+    expected = sorted(initial)
+    for _ in range(3000):
+        key = rng.randrange(1000)
+        if rng.random() < 0.5:
+            assert skiplist.remove(key) == (key in expected)
+            if key in expected:
+                expected.remove(key)
+        elif key not in expected:
+            skiplist.insert(key)
+            bisect.insort(expected, key)
+        start, stop = sorted(rng.randrange(len(expected) + 2) for _ in range(2))
+        assert skiplist.bisect_left(key) == bisect.bisect_left(expected, key)
+        assert skiplist.bisect_right(key) == bisect.bisect_right(expected, key)
+        assert skiplist.slice(start, stop) == expected[start:stop]
+    assert list(skiplist) == expected
+    assert len(skiplist) == len(expected)
+
+def test_empty():
+    skiplist = IndexedSkipList()
+    assert skiplist.slice(0, 10) == []
+    assert skiplist.bisect_left(1) == 0
+    assert not skiplist.remove(1)
@@ -0,0 +1,26 @@
+"""Round trips through the binary snapshot format"""
+
+import pytest
+
+import snapshot
+
+@pytest.mark.parametrize("keys", [
+    ["123", "456"],
+    [1, 2, 2 ** 40],
+    ["a", 1, None],
+    ["with\x00nul", "plain"],
+])
+def test_round_trip_keeps_keys(keys):
+    records = {key: {'name': f"player {index}", 'wins': index} for index, key in enumerate(keys)}
+    assert snapshot.loads(snapshot.dumps(records)) == records
+
+def test_round_trip_keeps_sparse_records():
+    records = {
+        '1': {'name': 'a', 'wins': 3, 'rating': 1510.5},
+        '2': {'name': 'b', 'tags': ['x', None]},
+        '3': {},
+    }
+    assert snapshot.loads(snapshot.dumps(records)) == records
+
+def test_empty_collection():
+    assert snapshot.loads(snapshot.dumps({})) == {}
@@ -0,0 +1,25 @@
+"""SqliteDatabase across processes"""
+
+import os
+
+import pytest
+
+from sqlite_database import SqliteDatabase
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_forked_process_opens_its_own_connections(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = SqliteDatabase()
+    db.register_player('1', 'a')
+    inherited = db._writer
+    
+    pid = os.fork()
+    if pid == 0:
+        # Like a preloaded gunicorn worker writing through the master's instance
+        ok = db.register_player('2', 'b') and db._writer is not inherited
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    
+    assert db._writer is inherited
+    assert db.get_player('2')['name'] == 'b'
@@ -0,0 +1,71 @@
+"""
+Channel announcements for duel reminders and starts
+Matches in the same channel starting in the same minute share one message
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from utils.embeds import create_duel_batch_embed, render_duel_embed
+
+logger = logging.getLogger(__name__)
+
+# Discord caps a message at 2000 characters and an embed at 25 fields
+MAX_BATCH = 25
+
+class ChannelAnnouncer:
+    """Collect duel announcements briefly and post one message per channel and minute
+    
+    The scheduler fires every job of a second together, so a short window
+    (batch_delay seconds) catches all matches of a minute. A lone match
+    keeps the regular single-duel embed.
+    """
+    
+    def __init__(self, bot, locale='ar', brand="DUEL LORDS", batch_delay=2.0):
+        self.bot = bot
+        self.locale = locale
+        self.brand = brand
+        self.batch_delay = batch_delay
+        self.pending = {}
+        self._tasks = set()
+    
+    def announce(self, kind, match):
+        """Queue a 'reminder' or 'start' announcement in the match's channel"""
+        if not match.get('channel_id'):
+            return
+        minute = datetime.fromisoformat(match['scheduled_time']).strftime('%Y-%m-%d %H:%M')
+        key = (int(match['channel_id']), kind, minute)
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = []
+            task = asyncio.get_running_loop().create_task(self._flush_later(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.append(match)
+    
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.batch_delay)
+        matches = self.pending.pop(key, [])
+        channel_id, kind, _ = key
+        try:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None or not hasattr(channel, 'send'):
+                return
+            for start in range(0, len(matches), MAX_BATCH):
+                await self._send(channel, kind, matches[start:start + MAX_BATCH])
+        except Exception as e:
+            logger.error(f"Error announcing {len(matches)} duel {kind}(s) in channel {channel_id}: {e}")
+    
+    async def _send(self, channel, kind, matches):
+        heading = "⚔️ Duel Reminder!" if kind == 'reminder' else "🚀 Duel Starting Now!"
+        if len(matches) == 1:
+            match = matches[0]
+            embed = render_duel_embed(kind, match, self.locale, self.brand)
+            content = f"{heading}\n<@{match['player1_id']}> vs <@{match['player2_id']}>"
+        else:
+            embed = create_duel_batch_embed(kind, matches, self.locale, self.brand)
+            player_ids = dict.fromkeys(match[key] for match in matches for key in ('player1_id', 'player2_id'))
+            mentions = ' '.join(f"<@{player_id}>" for player_id in player_ids)
+            content = f"{heading}\n{mentions}"[:2000]
+        await channel.send(content=content, embed=embed)
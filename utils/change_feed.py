@@ -0,0 +1,247 @@
+"""
+Live dashboard feed over Server-Sent Events
+One watcher thread turns database changes into events shared by every connected viewer
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class ChangeFeed:
+    """Fan database changes out to Server-Sent Events subscribers
+    
+    Four kinds of event are published:
+    - stats: the StatsAggregator counters, whenever they change
+    - result: a match that has just been completed
+    - bracket: a tournament whose record changed
+    - board: whatever the board callable returns (the dashboard's top
+      players and recent matches), once per batch of player or match changes
+    
+    Writes in this process arrive through the change listeners and wake the
+    watcher at once; writes by the bot process are picked up by the
+    aggregator snapshot taken every poll_interval. A reloaded collection is
+    diffed against the statuses and tournament records seen so far to
+    recover the per-record events.
+    
+    Each event is encoded once and the same bytes are queued to every
+    subscriber, so the work follows the rate of changes, not the number of
+    viewers. A subscriber that falls queue_size events behind is dropped;
+    its browser reconnects with Last-Event-ID and replays the recent events.
+    """
+    
+    def __init__(self, db, stats, board=None, poll_interval=1.0, backlog=100, queue_size=100):
+        self.db = db
+        self.stats = stats
+        self.board = board
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.recent = deque(maxlen=backlog)
+        self.latest_stats = None
+        self.latest_board = None
+        self.stats_version = None
+        self.next_id = 1
+        # Event ids carry the process epoch so another worker's ids are never replayed
+        self.epoch = f"{os.getpid():x}{int(time.time()):x}"
+        
+        self._lock = threading.Lock()
+        self._changes = deque()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.match_status = {}
+        self.tournaments = {}
+        db.add_change_listener(self._on_change)
+    
+    def _on_change(self, collection, key, record):
+        # Runs under the database lock, so only queue the change. Until a viewer
+        # starts the watcher in this process nothing would drain the queue, and
+        # the watcher loads the current state when it starts anyway
+        if self._pid != os.getpid():
+            return
+        if collection in ('players', 'matches', 'tournaments'):
+            self._changes.append((collection, key, record))
+            self._wake.set()
+    
+    def _ensure_started(self):
+        # Started lazily in the serving process, so a preloading master never owns it
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        try:
+            self._changes.clear()
+            self.match_status = {key: match.get('status') for key, match in self.db.get_all_matches().items()}
+            self.tournaments = {key: _fingerprint(tournament)
+                                for key, tournament in self.db.get_all_tournaments().items()}
+        except Exception as e:
+            logger.error(f"Change feed could not load the current state: {e}")
+        
+        logger.info("Change feed started")
+        while True:
+            try:
+                stats, version, _ = self.stats.snapshot()
+                self._drain()
+                if version != self.stats_version:
+                    self.stats_version = version
+                    self.publish('stats', stats)
+            except Exception as e:
+                logger.error(f"Error in change feed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def _drain(self):
+        reloaded = set()
+        changed = set()
+        while self._changes:
+            collection, key, record = self._changes.popleft()
+            changed.add(collection)
+            if key is None:
+                reloaded.add(collection)
+            elif collection == 'players':
+                continue
+            elif collection == 'matches':
+                self._match_changed(key, record)
+            else:
+                self._tournament_changed(key, record)
+        
+        if 'matches' in reloaded:
+            matches = self.db.get_all_matches()
+            for key in set(self.match_status) - set(matches):
+                del self.match_status[key]
+            for key, match in matches.items():
+                self._match_changed(key, match)
+        if 'tournaments' in reloaded:
+            tournaments = self.db.get_all_tournaments()
+            for key in set(self.tournaments) - set(tournaments):
+                self._tournament_changed(key, None)
+            for key, tournament in tournaments.items():
+                self._tournament_changed(key, tournament)
+        
+        # Built once per batch here rather than by every viewer reloading the page
+        if self.board is not None and changed & {'players', 'matches'}:
+            self.publish('board', self.board())
+    
+    def _match_changed(self, key, match):
+        previous = self.match_status.pop(key, None)
+        if match is None:
+            return
+        status = match.get('status')
+        self.match_status[key] = status
+        if status == 'completed' and previous != 'completed':
+            self.publish('result', {
+                'id': match.get('id', key),
+                'player1_id': match.get('player1_id') or match.get('challenger_id'),
+                'player2_id': match.get('player2_id') or match.get('opponent_id'),
+                'winner_id': match.get('winner_id'),
+                'tournament_id': match.get('tournament_id'),
+                'completed_at': match.get('completed_at'),
+            })
+    
+    def _tournament_changed(self, key, tournament):
+        fingerprint = _fingerprint(tournament) if tournament is not None else None
+        if self.tournaments.get(key) == fingerprint:
+            return
+        if fingerprint is None:
+            del self.tournaments[key]
+            self.publish('bracket', {'id': key, 'deleted': True})
+            return
+        self.tournaments[key] = fingerprint
+        self.publish('bracket', {
+            'id': tournament.get('id', key),
+            'name': tournament.get('name'),
+            'status': tournament.get('status'),
+            'participants': len(tournament.get('participants', [])),
+            'matches': tournament.get('matches', []),
+        })
+    
+    def publish(self, kind, data):
+        """Encode one event and queue it to every subscriber"""
+        with self._lock:
+            event_id = self.next_id
+            self.next_id += 1
+            payload = json.dumps(data, ensure_ascii=False, default=str)
+            message = f"id: {self.epoch}-{event_id}\nevent: {kind}\ndata: {payload}\n\n".encode('utf-8')
+            self.recent.append((event_id, message))
+            if kind == 'stats':
+                self.latest_stats = message
+            elif kind == 'board':
+                self.latest_board = message
+            
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self._drop(subscriber)
+    
+    def _drop(self, subscriber):
+        # Make room for the sentinel that ends the stream
+        self.subscribers.discard(subscriber)
+        while True:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                break
+        subscriber.put_nowait(None)
+    
+    def subscribe(self, last_event_id=None):
+        """A queue of encoded events, starting with what the client has not seen yet"""
+        self._ensure_started()
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            missed = self._missed(last_event_id)
+            if missed is None:
+                # New viewer, or too far behind to replay: start from the current state
+                missed = [message for message in (self.latest_stats, self.latest_board) if message]
+            for message in missed[-self.queue_size:]:
+                subscriber.put_nowait(message)
+            self.subscribers.add(subscriber)
+        return subscriber
+    
+    def _missed(self, last_event_id):
+        epoch, _, event_id = (last_event_id or '').rpartition('-')
+        if epoch != self.epoch or not event_id.isdigit():
+            return None
+        event_id = int(event_id)
+        if self.recent and self.recent[0][0] > event_id + 1:
+            return None
+        return [message for recent_id, message in self.recent if recent_id > event_id]
+    
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+    
+    def stream(self, last_event_id=None, keepalive=15, retry=5000):
+        """Yield Server-Sent Events bytes until the client goes away or is dropped
+        
+        Subscribes on the first iteration, so a response that is never
+        started leaves no subscriber behind.
+        """
+        subscriber = self.subscribe(last_event_id)
+        try:
+            yield f"retry: {retry}\n\n".encode('utf-8')
+            while True:
+                try:
+                    message = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    # Comment line; keeps proxies from closing an idle stream
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+def _fingerprint(record):
+    return json.dumps(record, sort_keys=True, default=str)
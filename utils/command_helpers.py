@@ -2,6 +2,8 @@ import discord
 from datetime import datetime
 import logging
 
+from models import Match, Player
+
 logger = logging.getLogger(__name__)
 
 class CommandResponse:
@@ -87,66 +89,66 @@ class MatchManager:
         """Create a new match"""
         return self.db.create_match(challenger_id, opponent_id, scheduled_time, description)
     
-    def accept_match(self, match_id, user_id):
-        """Accept a match challenge"""
+    def _get_match_record(self, match_id):
         match = self.db.get_match(match_id)
         if not match:
             raise ValueError("Match not found")
+        return Match.from_dict(match, match_id=match_id)
+    
+    def accept_match(self, match_id, user_id):
+        """Accept a match challenge"""
+        match = self._get_match_record(match_id)
         
-        if match['opponent_id'] != user_id:
+        if str(match.player2_id) != str(user_id):
             raise ValueError("Not your challenge to accept")
         
-        if match['status'] != 'pending':
+        if match.status != 'pending':
             raise ValueError("Match already responded to")
         
-        match['status'] = 'accepted'
-        self.db.update_match(match_id, match)
-        return match
+        match.status = 'accepted'
+        return self.db.update_match(match_id, match.to_dict())
     
     def decline_match(self, match_id, user_id):
         """Decline a match challenge"""
-        match = self.db.get_match(match_id)
-        if not match:
-            raise ValueError("Match not found")
+        match = self._get_match_record(match_id)
         
-        if match['opponent_id'] != user_id:
+        if str(match.player2_id) != str(user_id):
             raise ValueError("Not your challenge to decline")
         
-        if match['status'] != 'pending':
+        if match.status != 'pending':
             raise ValueError("Match already responded to")
         
-        match['status'] = 'declined'
-        self.db.update_match(match_id, match)
-        return match
+        match.status = 'declined'
+        return self.db.update_match(match_id, match.to_dict())
     
     def complete_match(self, match_id, winner_id, stats=None):
         """Complete a match with results"""
-        match = self.db.get_match(match_id)
-        if not match:
-            raise ValueError("Match not found")
+        match = self._get_match_record(match_id)
         
-        if match['status'] != 'accepted':
+        if match.status != 'accepted':
             raise ValueError("Match not accepted")
         
-        challenger_id = match['challenger_id']
-        opponent_id = match['opponent_id']
+        challenger_id, opponent_id = match.players
         
         if winner_id not in [challenger_id, opponent_id]:
             raise ValueError("Invalid winner")
         
-        match['status'] = 'completed'
-        match['winner_id'] = winner_id
-        match['completed_at'] = datetime.now().isoformat()
+        match.status = 'completed'
+        match.winner_id = winner_id
+        match.completed_at = datetime.now().isoformat()
         
         if stats:
-            match['stats'] = stats
+            match.extra = {**(match.extra or {}), 'stats': stats}
         
-        self.db.update_match(match_id, match)
+        # Match and both players are saved together, or not at all
+        with self.db.transaction():
+            self.db.update_match(match_id, match.to_dict())
+            
+            # Update player statistics
+            self._update_player_stats(challenger_id, opponent_id, winner_id, stats)
+            self.db.update_ratings(challenger_id, opponent_id, 1.0 if winner_id == challenger_id else 0.0)
         
-        # Update player statistics
-        self._update_player_stats(challenger_id, opponent_id, winner_id, stats)
-        
-        return match
+        return match.to_dict()
     
     def _update_player_stats(self, challenger_id, opponent_id, winner_id, stats):
         """Update player statistics after match"""
@@ -156,20 +158,24 @@ class MatchManager:
         if not challenger_data or not opponent_data:
             return
         
+        challenger = Player.from_dict(challenger_data, user_id=challenger_id)
+        opponent = Player.from_dict(opponent_data, user_id=opponent_id)
+        
         # Update win/loss records
         if winner_id == challenger_id:
-            challenger_data['wins'] += 1
-            opponent_data['losses'] += 1
+            challenger.wins += 1
+            opponent.losses += 1
         else:
-            challenger_data['losses'] += 1
-            opponent_data['wins'] += 1
+            challenger.losses += 1
+            opponent.wins += 1
         
         # Update kill/death stats if provided
         if stats:
-            challenger_data['kills'] += stats.get('challenger_kills', 0)
-            challenger_data['deaths'] += stats.get('challenger_deaths', 0)
-            opponent_data['kills'] += stats.get('opponent_kills', 0)
-            opponent_data['deaths'] += stats.get('opponent_deaths', 0)
-        
-        self.db.update_player(challenger_id, challenger_data)
-        self.db.update_player(opponent_id, opponent_data)
+            challenger.kills += stats.get('challenger_kills', 0)
+            challenger.deaths += stats.get('challenger_deaths', 0)
+            opponent.kills += stats.get('opponent_kills', 0)
+            opponent.deaths += stats.get('opponent_deaths', 0)
+        
+        with self.db.transaction():
+            self.db.update_player(challenger_id, challenger.to_dict())
+            self.db.update_player(opponent_id, opponent.to_dict())
@@ -0,0 +1,191 @@
+"""
+Bounded, concurrent delivery queue for direct messages
+Worker pool with a global send rate, per-recipient ordering, retries and dead-lettering
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows 50 requests/s per bot; an uncached DM costs two (open channel + send)
+DEFAULT_RATE = float(os.environ.get('DM_RATE_PER_SECOND', '20'))
+DEFAULT_WORKERS = int(os.environ.get('DM_WORKERS', '8'))
+
+# Recipients who refuse DMs are skipped for this long
+DEAD_LETTER_TTL = 6 * 3600
+
+class DMDeliveryQueue:
+    """Send DMs through a pool of workers instead of one await at a time
+    
+    send() returns as soon as the message is queued (waiting only when the
+    queue is full) and gives back a future that resolves to True once the
+    message was delivered or False if it was given up on. Messages to the
+    same recipient keep their order; different recipients go out in
+    parallel, paced by a shared rate limit.
+    
+    A 429 pauses every worker for the advertised retry time. Server errors
+    and timeouts are retried with exponential backoff. Recipients that are
+    Forbidden (DMs closed, bot blocked) or unknown are dead-lettered and
+    skipped until DEAD_LETTER_TTL passes.
+    """
+    
+    def __init__(self, bot, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, max_queue=1000, max_attempts=4):
+        self.bot = bot
+        self.worker_count = workers
+        self.rate = rate
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        
+        self.queue = None
+        self.workers = []
+        self.dead_letters = {}
+        self.stats = {'sent': 0, 'failed': 0, 'retried': 0, 'dead_lettered': 0}
+        
+        self._recipient_locks = {}
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+    
+    def _ensure_workers(self):
+        # Created lazily so the queue binds to the bot's running loop
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.workers = [task for task in self.workers if not task.done()]
+        while len(self.workers) < self.worker_count:
+            self.workers.append(asyncio.get_running_loop().create_task(self._worker()))
+    
+    async def send(self, recipient, label="message", **message):
+        """Queue a DM to a user, member or user id; message is passed to Messageable.send"""
+        self._ensure_workers()
+        user_id = int(getattr(recipient, 'id', recipient))
+        future = asyncio.get_running_loop().create_future()
+        
+        if self.is_dead_lettered(user_id):
+            logger.info(f"Skipping {label} to {user_id}: recipient does not accept DMs")
+            future.set_result(False)
+            return future
+        
+        await self.queue.put((recipient, user_id, label, message, future))
+        return future
+    
+    async def send_many(self, recipients, label="message", **message):
+        """Queue the same DM to several recipients and wait for all of them"""
+        futures = [await self.send(recipient, label, **message) for recipient in recipients]
+        return await asyncio.gather(*futures)
+    
+    def is_dead_lettered(self, user_id):
+        entry = self.dead_letters.get(int(user_id))
+        if entry is None:
+            return False
+        if time.monotonic() - entry[1] > DEAD_LETTER_TTL:
+            del self.dead_letters[int(user_id)]
+            return False
+        return True
+    
+    async def join(self):
+        """Wait until every queued message has been handled"""
+        if self.queue is not None:
+            await self.queue.join()
+    
+    def close(self):
+        for task in self.workers:
+            task.cancel()
+        self.workers = []
+    
+    async def _worker(self):
+        while True:
+            recipient, user_id, label, message, future = await self.queue.get()
+            try:
+                delivered = await self._deliver_in_order(recipient, user_id, label, message)
+                if not future.done():
+                    future.set_result(delivered)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_result(False)
+                raise
+            except Exception as e:
+                logger.error(f"Error delivering {label} to {user_id}: {e}")
+                if not future.done():
+                    future.set_result(False)
+            finally:
+                self.queue.task_done()
+    
+    async def _deliver_in_order(self, recipient, user_id, label, message):
+        # One lock per recipient with a user count, dropped when nobody holds it
+        entry = self._recipient_locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._deliver(recipient, user_id, label, message)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._recipient_locks[user_id]
+    
+    async def _throttle(self):
+        """Wait for a send slot under the shared rate and any 429 pause"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot, self._paused_until)
+        self._next_slot = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    async def _deliver(self, recipient, user_id, label, message):
+        # Messages queued before the recipient was dead-lettered
+        if self.is_dead_lettered(user_id):
+            return False
+        
+        for attempt in range(1, self.max_attempts + 1):
+            await self._throttle()
+            try:
+                if hasattr(recipient, 'id'):
+                    target = recipient
+                else:
+                    target = self.bot.get_user(user_id) or discord.Object(id=user_id)
+                # create_dm reuses a cached DM channel and skips fetch_user
+                channel = await self.bot.create_dm(target)
+                await channel.send(**message)
+                self.stats['sent'] += 1
+                return True
+            except (discord.Forbidden, discord.NotFound) as e:
+                self.dead_letters[user_id] = (f"{e.status} {e.text}", time.monotonic())
+                self.stats['dead_lettered'] += 1
+                logger.warning(f"Dead-lettered {label} to {user_id}: {e}")
+                return False
+            except discord.RateLimited as e:
+                # Rate limits are shared, so every worker backs off
+                self._pause(e.retry_after)
+                delay = 0
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    self._pause(float(e.response.headers.get('Retry-After', 1)))
+                    delay = 0
+                elif e.status >= 500:
+                    delay = self._backoff(attempt)
+                else:
+                    logger.error(f"Failed to send {label} to {user_id}: {e}")
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                delay = self._backoff(attempt)
+            
+            if attempt < self.max_attempts:
+                self.stats['retried'] += 1
+                logger.info(f"Retrying {label} to {user_id} (attempt {attempt})")
+                await asyncio.sleep(delay)
+        
+        self.stats['failed'] += 1
+        return False
+    
+    def _backoff(self, attempt):
+        return min(30.0, 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+    
+    def _pause(self, delay):
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + delay)
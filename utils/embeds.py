@@ -6,75 +6,128 @@ Beautiful Arabic-first embeds with comprehensive formatting
 import discord
 from datetime import datetime
 
-def create_duel_reminder_embed(match):
-    """Create reminder embed for upcoming duel"""
+from models import Match
+
+SERVER_FIELD_VALUE = "**IP:** `18.228.228.44`\n**Port:** `3827`"
+
+# Static parts of the duel notices per (kind, locale). Fields whose value
+# holds {placeholders} are filled per match; everything else is built once.
+DUEL_EMBED_TEMPLATES = {
+    ('reminder', 'ar'): {
+        'title': "⏰ تذكير مبارزة!",
+        'description': "مبارزتك تبدأ خلال 5 دقائق!",
+        'color': 0xFF6B35,
+        'fields': [
+            ("⚔️ المبارزة", "{players}", False),
+            ("🕐 الموعد", "{time}", True),
+            ("🌐 الخادم", SERVER_FIELD_VALUE, True),
+            ("📝 تعليمات", "• ادخل إلى لعبة BombSquad الآن\n• اتصل بالخادم\n• استعد للمعركة!", False),
+        ],
+        'footer': "حان وقت المعركة!",
+        'batch_title': "⏰ مبارزات تبدأ خلال 5 دقائق",
+    },
+    ('start', 'ar'): {
+        'title': "🚀 بدء المبارزة الآن!",
+        'description': "المبارزة بدأت! اذهبوا إلى الخادم فوراً",
+        'color': 0x43B581,
+        'fields': [
+            ("⚔️ المتبارزون", "{players}", False),
+            ("🌐 معلومات الاتصال", SERVER_FIELD_VALUE, True),
+            ("🏆 المكافأة", "الفائز يحصل على نقاط انتصار", True),
+        ],
+        'footer': "ليفز أفضل المقاتلين!",
+        'batch_title': "🚀 مبارزات تبدأ الآن!",
+    },
+    ('reminder', 'en'): {
+        'title': "⏰ Duel Reminder!",
+        'description': "Your duel starts in 5 minutes!",
+        'color': 0xFF6B35,
+        'fields': [
+            ("⚔️ Duel", "{players}", False),
+            ("🕐 Time", "{time}", True),
+            ("🌐 Server", SERVER_FIELD_VALUE, True),
+            ("📝 Instructions", "• Open BombSquad now\n• Connect to the server\n• Get ready to fight!", False),
+        ],
+        'footer': "Time to fight!",
+        'batch_title': "⏰ Duels starting in 5 minutes",
+    },
+    ('start', 'en'): {
+        'title': "🚀 Duel Starting Now!",
+        'description': "The duel has started! Join the server now",
+        'color': 0x43B581,
+        'fields': [
+            ("⚔️ Fighters", "{players}", False),
+            ("🌐 Connection", SERVER_FIELD_VALUE, True),
+            ("🏆 Reward", "The winner earns victory points", True),
+        ],
+        'footer': "May the best fighter win!",
+        'batch_title': "🚀 Duels starting now!",
+    },
+}
+
+_template_cache = {}
+
+def _duel_template(kind, locale, brand):
+    """Embed dict for a duel notice with only the per-match fields left to fill"""
+    key = (kind, locale, brand)
+    template = _template_cache.get(key)
+    if template is None:
+        spec = DUEL_EMBED_TEMPLATES.get((kind, locale)) or DUEL_EMBED_TEMPLATES[(kind, 'ar')]
+        embed = discord.Embed(title=spec['title'], description=spec['description'], color=spec['color'])
+        for name, value, inline in spec['fields']:
+            embed.add_field(name=name, value=value, inline=inline)
+        embed.set_footer(text=f"{brand} • {spec['footer']}")
+        data = embed.to_dict()
+        dynamic = [i for i, (_, value, _) in enumerate(spec['fields']) if '{' in value]
+        template = _template_cache[key] = (data, dynamic)
+    return template
+
+def _duel_values(match):
     scheduled_time = datetime.fromisoformat(match['scheduled_time'])
+    return {
+        'players': f"<@{match['player1_id']}> **VS** <@{match['player2_id']}>",
+        'time': f"<t:{int(scheduled_time.timestamp())}:F>",
+    }
+
+def render_duel_embed(kind, match, locale='ar', brand="DUEL LORDS"):
+    """Build the 'reminder' or 'start' embed for a match from its cached template"""
+    data, dynamic = _duel_template(kind, locale, brand)
+    values = _duel_values(match)
+    # Shallow copies keep later edits of the embed out of the cached template
+    fields = [dict(field) for field in data['fields']]
+    for i in dynamic:
+        fields[i]['value'] = fields[i]['value'].format_map(values)
+    return discord.Embed.from_dict(dict(
+        data,
+        fields=fields,
+        footer=dict(data['footer']),
+        timestamp=datetime.now().astimezone().isoformat()
+    ))
+
+def create_duel_batch_embed(kind, matches, locale='ar', brand="DUEL LORDS"):
+    """One embed announcing several duels of the same minute (at most 25 fields)"""
+    spec = DUEL_EMBED_TEMPLATES.get((kind, locale)) or DUEL_EMBED_TEMPLATES[(kind, 'ar')]
+    data, _ = _duel_template(kind, locale, brand)
     
     embed = discord.Embed(
-        title="⏰ تذكير مبارزة!",
-        description="مبارزتك تبدأ خلال 5 دقائق!",
-        color=0xFF6B35,
+        title=spec['batch_title'],
+        description=SERVER_FIELD_VALUE,
+        color=spec['color'],
         timestamp=datetime.now()
     )
-    
-    embed.add_field(
-        name="⚔️ المبارزة",
-        value=f"<@{match['player1_id']}> **VS** <@{match['player2_id']}>",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🕐 الموعد",
-        value=f"<t:{int(scheduled_time.timestamp())}:F>",
-        inline=True
-    )
-    
-    embed.add_field(
-        name="🌐 الخادم",
-        value="**IP:** `18.228.228.44`\n**Port:** `3827`",
-        inline=True
-    )
-    
-    embed.add_field(
-        name="📝 تعليمات",
-        value="• ادخل إلى لعبة BombSquad الآن\n• اتصل بالخادم\n• استعد للمعركة!",
-        inline=False
-    )
-    
-    embed.set_footer(text="DUEL LORDS • حان وقت المعركة!")
-    
+    for match in matches[:25]:
+        values = _duel_values(match)
+        embed.add_field(name=f"🆔 {match['id']}", value=f"{values['players']}\n{values['time']}", inline=False)
+    embed.set_footer(text=data['footer']['text'])
     return embed
 
+def create_duel_reminder_embed(match):
+    """Create reminder embed for upcoming duel"""
+    return render_duel_embed('reminder', match)
+
 def create_duel_start_embed(match):
     """Create embed for duel start notification"""
-    embed = discord.Embed(
-        title="🚀 بدء المبارزة الآن!",
-        description="المبارزة بدأت! اذهبوا إلى الخادم فوراً",
-        color=0x43B581,
-        timestamp=datetime.now()
-    )
-    
-    embed.add_field(
-        name="⚔️ المتبارزون",
-        value=f"<@{match['player1_id']}> **VS** <@{match['player2_id']}>",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🌐 معلومات الاتصال",
-        value="**IP:** `18.228.228.44`\n**Port:** `3827`",
-        inline=True
-    )
-    
-    embed.add_field(
-        name="🏆 المكافأة",
-        value="الفائز يحصل على نقاط انتصار",
-        inline=True
-    )
-    
-    embed.set_footer(text="DUEL LORDS • ليفز أفضل المقاتلين!")
-    
-    return embed
+    return render_duel_embed('start', match)
 
 def create_leaderboard_embed(players):
     """Create an embed for the leaderboard"""
@@ -226,10 +279,11 @@ def create_bracket_embed(tournament_data, bot):
         return embed
     
     bracket_text = ""
-    for i, match in enumerate(tournament_data['matches'], 1):
+    for i, entry in enumerate(tournament_data['matches'], 1):
         try:
-            player1 = bot.get_user(int(match['player1']))
-            player2 = bot.get_user(int(match['player2']))
+            match = Match.from_dict(entry, match_id=str(i))
+            player1 = bot.get_user(int(match.player1_id))
+            player2 = bot.get_user(int(match.player2_id))
             
             player1_name = player1.display_name if player1 else "Unknown"
             player2_name = player2.display_name if player2 else "Unknown"
@@ -240,7 +294,7 @@ def create_bracket_embed(tournament_data, bot):
                 'completed': '✅'
             }
             
-            bracket_text += f"{status_emoji.get(match['status'], '❓')} **Match {i}:** {player1_name} vs {player2_name}\n"
+            bracket_text += f"{status_emoji.get(match.status, '❓')} **Match {i}:** {player1_name} vs {player2_name}\n"
             
         except Exception as e:
             bracket_text += f"❓ **Match {i}:** Error loading match\n"
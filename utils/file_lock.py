@@ -0,0 +1,57 @@
+import os
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class FileLock:
+    """Advisory exclusive lock on a file, shared by every process using the same path
+    
+    Not reentrant; callers serialize threads themselves. On platforms without
+    fcntl the lock is a no-op.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        if fcntl is None:
+            logger.warning("fcntl not available - cross-process locking disabled")
+    
+    @property
+    def locked(self):
+        return self.fd is not None
+    
+    def acquire(self):
+        """Block until the lock is held"""
+        if self.fd is not None:
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except Exception:
+                os.close(fd)
+                raise
+        self.fd = fd
+    
+    def release(self):
+        """Release the lock if held"""
+        if self.fd is None:
+            return
+        fd, self.fd = self.fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,123 @@
+"""
+Display name resolution for leaderboards and match lists
+Gateway cache first, then a TTL/LRU cache of fetched users, then stored player names
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# _fetch result for a failure worth retrying: not cached, the fallback name is shown
+_UNAVAILABLE = object()
+
+class DisplayNameResolver:
+    """Resolve many user ids to display names without a REST call per row
+    
+    Tiers, cheapest first:
+    1. the gateway cache (guild.get_member / bot.get_user)
+    2. names fetched earlier, kept for ttl seconds in an LRU of max_size ids
+    3. the stored player name passed in as a fallback
+    
+    Ids missing from the first two tiers are fetched concurrently in one
+    batch (at most max_concurrency requests at a time), bounded by
+    fetch_timeout so a slow API never holds up the reply. Unknown users are
+    remembered too, so they are not retried on every command; any other
+    fetch error falls back to the stored name and is retried next time.
+    """
+    
+    def __init__(self, bot, ttl=3600, max_size=5000, max_concurrency=5, fetch_timeout=2.0):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_size = max_size
+        self.fetch_timeout = fetch_timeout
+        self.cache = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats = {'gateway': 0, 'cached': 0, 'fetched': 0, 'fallback': 0}
+    
+    def _cached(self, user_id):
+        entry = self.cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self.cache[user_id]
+            return None
+        self.cache.move_to_end(user_id)
+        return entry
+    
+    def _remember(self, user_id, name):
+        self.cache[user_id] = (name, time.monotonic() + self.ttl)
+        self.cache.move_to_end(user_id)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+    
+    def _remember_late(self, user_id, task):
+        if not task.cancelled() and task.exception() is None and task.result() is not _UNAVAILABLE:
+            self._remember(user_id, task.result())
+    
+    def _from_gateway(self, user_id, guild):
+        member = guild.get_member(user_id) if guild is not None else None
+        user = member or self.bot.get_user(user_id)
+        return user.display_name if user else None
+    
+    async def _fetch(self, user_id):
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+                return user.display_name
+            except discord.NotFound:
+                return None
+            except Exception as e:
+                # Rate limits, connection errors, a dropped gateway: never fail the command
+                logger.warning(f"Could not fetch user {user_id}: {e}")
+                return _UNAVAILABLE
+    
+    async def resolve(self, user_ids, guild=None, fallbacks=None):
+        """Map each user id to a display name; fallbacks maps ids to stored names"""
+        fallbacks = fallbacks or {}
+        names = {}
+        missing = []
+        
+        for raw_id in dict.fromkeys(user_ids):
+            user_id = int(raw_id)
+            name = self._from_gateway(user_id, guild)
+            if name is not None:
+                self.stats['gateway'] += 1
+                names[raw_id] = name
+                continue
+            entry = self._cached(user_id)
+            if entry is not None and entry[0] is not None:
+                self.stats['cached'] += 1
+                names[raw_id] = entry[0]
+            elif entry is None:
+                missing.append(raw_id)
+        
+        if missing:
+            tasks = [asyncio.ensure_future(self._fetch(int(raw_id))) for raw_id in missing]
+            done, pending = await asyncio.wait(tasks, timeout=self.fetch_timeout)
+            for raw_id, task in zip(missing, tasks):
+                if task in pending:
+                    # Left running so the result still warms the cache
+                    task.add_done_callback(lambda t, user_id=int(raw_id): self._remember_late(user_id, t))
+                    continue
+                name = task.result()
+                if name is _UNAVAILABLE:
+                    continue
+                self._remember(int(raw_id), name)
+                if name is not None:
+                    self.stats['fetched'] += 1
+                    names[raw_id] = name
+        
+        for raw_id in dict.fromkeys(user_ids):
+            if raw_id not in names:
+                self.stats['fallback'] += 1
+                names[raw_id] = fallbacks.get(raw_id) or fallbacks.get(str(raw_id)) or 'Unknown'
+        return names
+    
+    async def resolve_one(self, user_id, guild=None, fallback=None):
+        names = await self.resolve([user_id], guild, {user_id: fallback} if fallback else None)
+        return names[user_id]
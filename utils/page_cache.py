@@ -0,0 +1,89 @@
+"""
+Rendered page cache for the web dashboard
+Pages are kept per route and query with gzip/brotli bodies, valid until the data version moves
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Only gzip bodies are kept
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+class CachedPage:
+    """One rendered page: its body in every stored encoding and an ETag of its content"""
+    
+    def __init__(self, version, body, mimetype):
+        self.version = version
+        self.mimetype = mimetype
+        raw = body.encode('utf-8')
+        self.etag = hashlib.blake2b(raw, digest_size=12).hexdigest()
+        # Compressed once here, so hits never compress
+        self.bodies = {'identity': raw}
+        if len(raw) >= MIN_COMPRESS_SIZE:
+            self.bodies['gzip'] = gzip.compress(raw, compresslevel=9)
+            if brotli is not None:
+                self.bodies['br'] = brotli.compress(raw, quality=11)
+    
+    def encoding_for(self, accept):
+        """Best stored encoding the client takes; accept maps an encoding to its quality
+        
+        Flask's request.accept_encodings works as accept.
+        """
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and accept[encoding] > 0:
+                return encoding
+        return 'identity'
+
+class PageCache:
+    """Rendered pages keyed by (path, query), valid for a single data version
+    
+    The storage layer's data_version() moves on every write, so a page is
+    rendered once per version and then served from memory, already
+    compressed. Entries of an older version are replaced when they are next
+    requested; max_entries bounds the cache, least recently used first.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.pages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, version):
+        """The cached page for key if it was rendered at this version, else None"""
+        with self._lock:
+            page = self.pages.get(key)
+            if page is None or page.version != version:
+                self.misses += 1
+                return None
+            self.pages.move_to_end(key)
+            self.hits += 1
+            return page
+    
+    def put(self, key, version, body, mimetype='text/html'):
+        """Store a freshly rendered body and return its CachedPage"""
+        # Compress outside the lock; concurrent misses for one key may both render
+        page = CachedPage(version, body, mimetype)
+        with self._lock:
+            current = self.pages.get(key)
+            if current is None or current.version <= version:
+                self.pages[key] = page
+                self.pages.move_to_end(key)
+            while len(self.pages) > self.max_entries:
+                self.pages.popitem(last=False)
+        return page
+    
+    def clear(self):
+        with self._lock:
+            self.pages.clear()
@@ -0,0 +1,88 @@
+"""
+Elo ratings for duel results
+Incremental updates per recorded result, plus a batched replay of the whole match history
+"""
+
+import logging
+import os
+
+try:
+    import numpy as np
+except ImportError:  # Replay falls back to a plain loop
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = float(os.environ.get('ELO_K_FACTOR', '32'))
+
+def expected_score(rating, opponent_rating):
+    """Chance of winning against the opponent, as Elo predicts it"""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+def rate_match(rating1, rating2, score1, k_factor=K_FACTOR):
+    """New ratings after a match; score1 is 1 for a player 1 win, 0.5 for a draw, 0 for a loss"""
+    delta = k_factor * (score1 - expected_score(rating1, rating2))
+    return rating1 + delta, rating2 - delta
+
+def match_score(match):
+    """(player1_id, player2_id, score1) of a completed match, or None if it cannot be rated"""
+    if match.status != 'completed' or not match.player1_id or not match.player2_id:
+        return None
+    player1_id, player2_id = str(match.player1_id), str(match.player2_id)
+    if player1_id == player2_id:
+        return None
+    winner_id = str(match.winner_id) if match.winner_id else None
+    if winner_id == player1_id:
+        return player1_id, player2_id, 1.0
+    if winner_id == player2_id:
+        return player1_id, player2_id, 0.0
+    return player1_id, player2_id, 0.5
+
+def replay(results, k_factor=K_FACTOR):
+    """Ratings after replaying (player1_id, player2_id, score1) results in order
+
+    The results are split into waves in which no player appears twice;
+    each match goes into the wave after the last one its players were in.
+    A wave only depends on earlier waves, so it is rated in one vectorized
+    step and the outcome equals a match-by-match replay.
+    """
+    players = {}
+    waves = []
+    last_wave = {}
+    for player1_id, player2_id, score1 in results:
+        for player_id in (player1_id, player2_id):
+            players.setdefault(player_id, len(players))
+        wave = max(last_wave.get(player1_id, -1), last_wave.get(player2_id, -1)) + 1
+        last_wave[player1_id] = last_wave[player2_id] = wave
+        if wave == len(waves):
+            waves.append(([], [], []))
+        first, second, scores = waves[wave]
+        first.append(players[player1_id])
+        second.append(players[player2_id])
+        scores.append(score1)
+
+    if np is not None:
+        ratings = np.full(len(players), DEFAULT_RATING)
+        for first, second, scores in waves:
+            first = np.array(first)
+            second = np.array(second)
+            expected = 1 / (1 + 10 ** ((ratings[second] - ratings[first]) / 400))
+            delta = k_factor * (np.array(scores) - expected)
+            ratings[first] += delta
+            ratings[second] -= delta
+        ratings = ratings.tolist()
+    else:
+        ratings = [DEFAULT_RATING] * len(players)
+        for wave in waves:
+            for player1, player2, score1 in zip(*wave):
+                ratings[player1], ratings[player2] = rate_match(ratings[player1], ratings[player2], score1, k_factor)
+
+    logger.info(f"Replayed {sum(len(wave[2]) for wave in waves)} results in {len(waves)} waves")
+    return {player_id: ratings[index] for player_id, index in players.items()}
+
+if __name__ == "__main__":
+    # Recompute every rating from the stored match history
+    logging.basicConfig(level=logging.INFO)
+    from database import create_database
+    create_database().recompute_ratings()
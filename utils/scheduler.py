@@ -1,54 +1,281 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.date import DateTrigger
-import discord
+import asyncio
 import logging
-from datetime import datetime
+import os
+import time
+from datetime import datetime, timedelta
+
+from models import job_fired
+from utils.timing_wheel import TimingWheel
 
 logger = logging.getLogger(__name__)
 
+REMINDER = 'reminder'
+START = 'start'
+
+# How long before the scheduled time each notice goes out
+DEFAULT_LEADS = {
+    REMINDER: timedelta(seconds=int(os.environ.get('MATCH_REMINDER_LEAD_SECONDS', '300'))),
+    START: timedelta(seconds=int(os.environ.get('MATCH_START_LEAD_SECONDS', '0'))),
+}
+
+# Jobs later than this were missed (bot offline) rather than delayed
+MISFIRE_THRESHOLD = 60
+
 class MatchScheduler:
-    def __init__(self, bot=None):
+    """Fires match reminder and start events at their exact times
+    
+    Jobs sit in a hierarchical timing wheel (utils/timing_wheel.py), so
+    arming, cancelling and expiring a job is O(1) however many duels are
+    scheduled. A single event loop timer is armed for the wheel's next
+    deadline, so an idle scheduler does no work and a wakeup only touches
+    the jobs that are due. Lead times come from DEFAULT_LEADS or the leads
+    argument; lag_stats() reports how late jobs fired.
+    
+    Fired jobs are recorded in the match itself (see models.job_fired):
+    before a handler runs, the claim coroutine marks the job in storage and
+    reports whether this process won it. Pending jobs are recovered at
+    startup from the scheduled matches.
+    
+    All methods except the database change listener must be called from the
+    event loop thread.
+    """
+    
+    def __init__(self, bot=None, on_reminder=None, on_start=None, claim=None, leads=None):
         self.bot = bot
-        self.scheduler = AsyncIOScheduler()
-        self.scheduler.start()
+        self.on_reminder = on_reminder
+        self.on_start = on_start
+        self.claim = claim
+        self.leads = dict(DEFAULT_LEADS, **(leads or {}))
+        self.loop = None
+        
+        self.wheel = TimingWheel()
+        self.stats = {'fired': 0, 'misfired': 0, 'last_lag': 0.0, 'max_lag': 0.0, 'total_lag': 0.0}
+        self._timer = None
+        self._timer_when = None
+        self._tasks = set()
+        self._resync_pending = False
         logger.info("Match scheduler started")
     
     def set_bot(self, bot):
         """Set the bot instance after initialization"""
         self.bot = bot
     
-    def schedule_match_reminder(self, match_id, reminder_time, guild_id):
-        """Schedule a match reminder"""
-        try:
-            self.scheduler.add_job(
-                self._send_match_reminder,
-                DateTrigger(run_date=reminder_time),
-                args=[match_id, guild_id],
-                id=f"reminder_{match_id}",
-                replace_existing=True
-            )
-            logger.info(f"Scheduled reminder for match {match_id} at {reminder_time}")
-        except Exception as e:
-            logger.error(f"Error scheduling reminder: {e}")
+    def set_handlers(self, on_reminder=None, on_start=None, claim=None):
+        """Set the coroutines called with the match dict when a job fires"""
+        if on_reminder is not None:
+            self.on_reminder = on_reminder
+        if on_start is not None:
+            self.on_start = on_start
+        if claim is not None:
+            self.claim = claim
     
-    async def _send_match_reminder(self, match_id, guild_id):
-        """Send match reminder"""
+    def _get_loop(self):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        return self.loop
+    
+    # Match level API
+    def _match_jobs(self, match_id, match):
+        """Work out the (kind, fire time) jobs a match still needs"""
+        if match.get('status') != 'scheduled' or not match.get('scheduled_time'):
+            return []
+        
         try:
-            # This would be implemented with the bot instance
-            # For now, just log the reminder
-            logger.info(f"Match reminder for {match_id} in guild {guild_id}")
-        except Exception as e:
-            logger.error(f"Error sending match reminder: {e}")
+            start_time = datetime.fromisoformat(match['scheduled_time'])
+        except (TypeError, ValueError):
+            logger.error(f"Match {match_id} has an invalid scheduled time: {match['scheduled_time']!r}")
+            return []
+        
+        jobs = []
+        start_at = start_time - self.leads[START]
+        # A late reminder is still useful as long as the start notice is
+        # ahead; once it is due, the start notice covers it
+        if not job_fired(match, REMINDER) and start_at > datetime.now():
+            jobs.append((REMINDER, (start_time - self.leads[REMINDER]).timestamp()))
+        if not job_fired(match, START):
+            jobs.append((START, start_at.timestamp()))
+        return jobs
+    
+    def schedule_match(self, match, match_id=None):
+        """Arm (or re-arm) the reminder and start jobs for a match"""
+        match_id = match_id or match.get('id')
+        if not match_id:
+            return
+        
+        match = dict(match, id=match_id)
+        jobs = dict(self._match_jobs(match_id, match))
+        for kind in (REMINDER, START):
+            if kind in jobs:
+                self._add_job(match_id, kind, jobs[kind], match)
+            else:
+                self._remove_job(match_id, kind)
+        self._arm_timer()
+    
+    def load_matches(self, matches):
+        """Arm jobs for every match in a {id: match} dict or a list of matches
+        
+        Used at startup; jobs that fell due while the bot was offline fire
+        once on the next wakeup.
+        """
+        items = matches.items() if isinstance(matches, dict) else ((m.get('id'), m) for m in matches)
+        for match_id, match in items:
+            if not match_id:
+                continue
+            match = dict(match, id=match_id)
+            for kind, when in self._match_jobs(match_id, match):
+                self.wheel.add((match_id, kind), when, match)
+        self._arm_timer()
+        logger.info(f"Armed {len(self.wheel)} match jobs")
+    
+    def cancel_match(self, match_id):
+        """Drop every job of a match"""
+        self._remove_job(match_id, REMINDER)
+        self._remove_job(match_id, START)
+        self._arm_timer()
+    
+    def schedule_match_reminder(self, match_id, reminder_time, guild_id=None):
+        """Schedule a single reminder job"""
+        self._add_job(match_id, REMINDER, reminder_time, {'id': match_id, 'guild_id': guild_id})
+        self._arm_timer()
+        logger.info(f"Scheduled reminder for match {match_id} at {reminder_time}")
     
     def cancel_match_reminder(self, match_id):
         """Cancel a match reminder"""
+        self._remove_job(match_id, REMINDER)
+        self._arm_timer()
+    
+    def watch(self, db):
+        """Keep the jobs in step with the matches stored in db
+        
+        db must offer add_change_listener(); the listener may run on any
+        thread and hands the change over to the event loop.
+        """
+        loop = self._get_loop()
+        
+        def on_change(collection, key, record):
+            if collection != 'matches':
+                return
+            if key is None:
+                # Whole collection reloaded from disk
+                loop.call_soon_threadsafe(self._start_resync, db)
+            elif record is None:
+                loop.call_soon_threadsafe(self.cancel_match, key)
+            else:
+                loop.call_soon_threadsafe(self.schedule_match, dict(record), key)
+        
+        db.add_change_listener(on_change)
+    
+    def _start_resync(self, db):
+        # A burst of reloads needs only one rescan
+        if self._resync_pending:
+            return
+        self._resync_pending = True
+        task = self._get_loop().create_task(self._resync(db))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _resync(self, db):
         try:
-            self.scheduler.remove_job(f"reminder_{match_id}")
-            logger.info(f"Cancelled reminder for match {match_id}")
+            self._resync_pending = False
+            matches = await self._get_loop().run_in_executor(None, db.get_upcoming_matches)
         except Exception as e:
-            logger.error(f"Error cancelling reminder: {e}")
+            logger.error(f"Error reloading matches for the scheduler: {e}")
+            return
+        self.wheel.clear()
+        self.load_matches(matches)
+    
+    # Timing wheel
+    def _add_job(self, match_id, kind, when, match):
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        self.wheel.add((match_id, kind), when, match)
+    
+    def _remove_job(self, match_id, kind):
+        self.wheel.cancel((match_id, kind))
+    
+    def _arm_timer(self):
+        """Point the loop timer at the wheel's next deadline"""
+        when = self.wheel.next_deadline()
+        if when == self._timer_when:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_when = when
+        if when is not None:
+            self._timer = self._get_loop().call_later(max(0, when - time.time()), self._run_due)
+    
+    def _run_due(self):
+        self._timer = None
+        self._timer_when = None
+        now = time.time()
+        due = {}
+        for (match_id, kind), when, match in self.wheel.advance(now):
+            due[(match_id, kind)] = match
+            self._record_lag(now - when)
+        
+        for (match_id, kind), match in due.items():
+            # A reminder that is only due together with the start is redundant
+            if kind == REMINDER and (match_id, START) in due:
+                continue
+            self._dispatch(kind, match)
+        self._arm_timer()
+    
+    def _record_lag(self, lag):
+        if lag > MISFIRE_THRESHOLD:
+            self.stats['misfired'] += 1
+            return
+        self.stats['fired'] += 1
+        self.stats['last_lag'] = lag
+        self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+        self.stats['total_lag'] += lag
+        if lag > 5:
+            logger.warning(f"Match scheduler is running {lag:.1f}s behind")
+    
+    def lag_stats(self):
+        """Pending job count and how late fired jobs ran, in seconds"""
+        fired = self.stats['fired']
+        return {
+            'pending': len(self.wheel),
+            'fired': fired,
+            'misfired': self.stats['misfired'],
+            'last_lag': round(self.stats['last_lag'], 3),
+            'max_lag': round(self.stats['max_lag'], 3),
+            'avg_lag': round(self.stats['total_lag'] / fired, 3) if fired else 0.0,
+        }
+    
+    def _dispatch(self, kind, match):
+        handler = self.on_reminder if kind == REMINDER else self.on_start
+        if handler is None:
+            logger.info(f"Match {kind} for {match['id']} (no handler set)")
+            return
+        task = self._get_loop().create_task(self._run_handler(handler, kind, match))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_handler(self, handler, kind, match):
+        try:
+            # Jobs that were already due at startup wait for the gateway
+            if self.bot is not None:
+                await self.bot.wait_until_ready()
+            # The claim is persisted first, so a restart or a second bot
+            # process never sends the same notice twice
+            if self.claim is not None and not await self.claim(match['id'], kind):
+                logger.info(f"Match {kind} for {match['id']} already handled")
+                return
+            await handler(match)
+        except Exception as e:
+            logger.error(f"Error running match {kind} for {match['id']}: {e}")
+    
+    def pending_jobs(self):
+        """Number of armed jobs"""
+        return len(self.wheel)
     
     def shutdown(self):
         """Shutdown the scheduler"""
-        self.scheduler.shutdown()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_when = None
+        self.wheel.clear()
         logger.info("Match scheduler shutdown")
@@ -0,0 +1,202 @@
+"""
+Season statistics across all players
+Per-player stat columns kept as NumPy arrays and updated as results are recorded
+"""
+
+import bisect
+import logging
+import math
+
+try:
+    import numpy as np
+except ImportError:  # Pure Python fallback, same results but slower
+    np = None
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = ('wins', 'losses', 'draws', 'kills', 'deaths')
+KILLS = STAT_COLUMNS.index('kills')
+DEATHS = STAT_COLUMNS.index('deaths')
+
+# K/D percentiles reported by summary()
+PERCENTILES = (50, 90, 99)
+
+# Lower bounds of the kill distribution buckets
+KILL_BUCKETS = (0, 1, 5, 10, 25, 50, 100)
+
+class SeasonStats:
+    """Global kill/death aggregates without a Python loop per player
+    
+    Every player is one row of a column-major integer array with the
+    columns in STAT_COLUMNS. update_player() overwrites a single row when a
+    result is recorded and adjusts the running totals; summary() answers
+    with a few vectorized passes: averages, the top killer, the best K/D,
+    K/D percentiles and the kill distribution. The result is cached until
+    the next change. Completed matches are counted as their status
+    changes, so nothing reloads the match history.
+    
+    Without NumPy the same API runs on plain lists.
+    """
+    
+    def __init__(self):
+        self.rows = {}
+        self.user_ids = []
+        self.names = []
+        self.completed = set()
+        self.columns = self._allocate(64)
+        # Column sums, adjusted on every row change instead of re-summed
+        self.totals = [0] * len(STAT_COLUMNS)
+        # Last summary(), dropped on every change
+        self._summary = None
+    
+    def __len__(self):
+        return len(self.user_ids)
+    
+    def _allocate(self, capacity):
+        # Column-major, so each stat is one contiguous array
+        if np is not None:
+            return np.zeros((len(STAT_COLUMNS), capacity), dtype=np.int64)
+        return [[] for _ in STAT_COLUMNS]
+    
+    def load(self, players, matches=None):
+        """Rebuild from {user_id: player} and optionally {match_id: match}"""
+        self.rows = {user_id: row for row, user_id in enumerate(players)}
+        self.user_ids = list(players)
+        self.names = [player.get('name', '') for player in players.values()]
+        columns = [[player.get(column, 0) for player in players.values()] for column in STAT_COLUMNS]
+        if np is not None:
+            self.columns = self._allocate(max(64, len(self.user_ids) * 2))
+            self.columns[:, :len(self.user_ids)] = columns
+        else:
+            self.columns = columns
+        self.totals = [sum(column) for column in columns]
+        
+        if matches is not None:
+            self.completed = {match_id for match_id, match in matches.items() if match.get('status') == 'completed'}
+        self._summary = None
+        logger.info(f"Season stats loaded for {len(self.user_ids)} players")
+    
+    def update_player(self, user_id, player):
+        """Set one player's row from its stored dict; a None player removes it"""
+        self._summary = None
+        row = self.rows.get(user_id)
+        if player is None:
+            if row is not None:
+                self._remove(user_id, row)
+            return
+        
+        if row is None:
+            row = len(self.user_ids)
+            self.rows[user_id] = row
+            self.user_ids.append(user_id)
+            self.names.append('')
+            if np is None:
+                for column in self.columns:
+                    column.append(0)
+            elif row == self.columns.shape[1]:
+                grown = self._allocate(row * 2)
+                grown[:, :row] = self.columns
+                self.columns = grown
+        
+        self.names[row] = player.get('name', '')
+        for index, column in enumerate(STAT_COLUMNS):
+            value = player.get(column, 0)
+            self.totals[index] += value - int(self.columns[index][row])
+            self.columns[index][row] = value
+    
+    def _remove(self, user_id, row):
+        for index in range(len(STAT_COLUMNS)):
+            self.totals[index] -= int(self.columns[index][row])
+        # Move the last row into the gap so the rows stay dense
+        last = len(self.user_ids) - 1
+        if row != last:
+            moved = self.user_ids[last]
+            self.user_ids[row] = moved
+            self.names[row] = self.names[last]
+            for column in self.columns:
+                column[row] = column[last]
+            self.rows[moved] = row
+        del self.rows[user_id]
+        self.user_ids.pop()
+        self.names.pop()
+        if np is None:
+            for column in self.columns:
+                column.pop()
+        else:
+            self.columns[:, last] = 0
+    
+    def update_match(self, match_id, match):
+        """Track whether a match counts as completed; a None match removes it"""
+        self._summary = None
+        if match is not None and match.get('status') == 'completed':
+            self.completed.add(match_id)
+        else:
+            self.completed.discard(match_id)
+    
+    def summary(self):
+        """Season aggregates, or None when no players are registered"""
+        count = len(self.user_ids)
+        if not count:
+            return None
+        if self._summary is None:
+            self._summary = self._compute(count)
+        return self._summary
+    
+    def _compute(self, count):
+        if np is not None:
+            kills = self.columns[KILLS, :count]
+            deaths = self.columns[DEATHS, :count]
+            kd = np.where(deaths > 0, kills / np.maximum(deaths, 1), kills)
+            top_killer = int(kills.argmax())
+            best_kd = int(kd.argmax())
+            kd_percentiles = [float(value) for value in np.percentile(kd, PERCENTILES)]
+            buckets = np.searchsorted(KILL_BUCKETS, kills, side='right') - 1
+            distribution = [int(value) for value in np.bincount(buckets, minlength=len(KILL_BUCKETS))]
+            kd_values = kd
+        else:
+            kills = self.columns[KILLS]
+            kd_values = [k / d if d > 0 else k for k, d in zip(kills, self.columns[DEATHS])]
+            top_killer = max(range(count), key=kills.__getitem__)
+            best_kd = max(range(count), key=kd_values.__getitem__)
+            kd_percentiles = _percentiles(sorted(kd_values), PERCENTILES)
+            distribution = [0] * len(KILL_BUCKETS)
+            for value in kills:
+                distribution[bisect.bisect_right(KILL_BUCKETS, value) - 1] += 1
+        
+        totals = dict(zip(STAT_COLUMNS, self.totals))
+        completed = len(self.completed)
+        return {
+            'players': count,
+            'totals': totals,
+            'completed_matches': completed,
+            'kills_per_match': totals['kills'] / completed if completed else 0,
+            'kills_per_player': totals['kills'] / count,
+            'kd_ratio': totals['kills'] / totals['deaths'] if totals['deaths'] else 0,
+            'top_killer': {'user_id': self.user_ids[top_killer], 'name': self.names[top_killer],
+                           'kills': int(kills[top_killer])},
+            'best_kd': {'user_id': self.user_ids[best_kd], 'name': self.names[best_kd],
+                        'kd_ratio': float(kd_values[best_kd])},
+            'kd_percentiles': dict(zip(PERCENTILES, kd_percentiles)),
+            'kill_distribution': dict(zip(_bucket_labels(), distribution)),
+        }
+
+def _percentiles(values, percents):
+    """Linear-interpolated percentiles of sorted values, as numpy.percentile computes them"""
+    results = []
+    for percent in percents:
+        position = (len(values) - 1) * percent / 100
+        low = math.floor(position)
+        high = min(low + 1, len(values) - 1)
+        results.append(values[low] + (values[high] - values[low]) * (position - low))
+    return results
+
+def _bucket_labels():
+    labels = []
+    for low, high in zip(KILL_BUCKETS, KILL_BUCKETS[1:] + (None,)):
+        if high is None:
+            labels.append(f"{low}+")
+        elif high - low == 1:
+            labels.append(str(low))
+        else:
+            labels.append(f"{low}-{high - 1}")
+    return labels
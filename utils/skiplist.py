@@ -0,0 +1,160 @@
+"""
+Indexable skiplist for leaderboard rankings
+A sorted set of unique keys with logarithmic insert, remove, rank and positional lookups
+"""
+
+import random
+
+MAX_LEVEL = 32
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+    
+    def __init__(self, key, height):
+        self.key = key
+        self.next = [None] * height
+        # width[i]: how many positions the level i link skips forward
+        self.width = [1] * height
+
+def _random_height():
+    # Geometric with p = 1/2: one plus the trailing zero bits of a random word
+    bits = random.getrandbits(MAX_LEVEL - 1) | (1 << (MAX_LEVEL - 1))
+    return (bits & -bits).bit_length()
+
+class IndexedSkipList:
+    """Sorted unique keys with O(log n) expected insert, remove, bisect and index
+    
+    Every link records how many elements it skips, so the position of a key
+    and the key at a position are found on the same descent as a search.
+    The head sits at position 0 and the element at index i at position i+1;
+    links that end past the last element count up to position len+1.
+    """
+    
+    def __init__(self, keys=()):
+        self.head = _Node(None, MAX_LEVEL)
+        self.level = 1
+        self.size = 0
+        keys = sorted(keys)
+        if keys:
+            self._build(keys)
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        return self.iter_from(0)
+    
+    def _build(self, keys):
+        # Link presorted keys level by level in one pass instead of n inserts
+        last = [self.head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        for position, key in enumerate(keys, 1):
+            node = _Node(key, _random_height())
+            for i in range(len(node.next)):
+                last[i].next[i] = node
+                last[i].width[i] = position - last_position[i]
+                last[i] = node
+                last_position[i] = position
+            self.level = max(self.level, len(node.next))
+        self.size = len(keys)
+        for i in range(MAX_LEVEL):
+            last[i].width[i] = self.size + 1 - last_position[i]
+    
+    def _predecessors(self, key):
+        """Last node before key on every level, with its position"""
+        update = [self.head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node = self.head
+        position = 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+            update[i] = node
+            positions[i] = position
+        return update, positions
+    
+    def insert(self, key):
+        """Add a key that is not in the list yet"""
+        update, positions = self._predecessors(key)
+        height = _random_height()
+        if height > self.level:
+            # The head's unused levels have been skipping to the end all along
+            for i in range(self.level, height):
+                self.head.width[i] = self.size + 1
+            self.level = height
+        
+        node = _Node(key, height)
+        position = positions[0] + 1
+        for i in range(height):
+            previous = update[i]
+            node.next[i] = previous.next[i]
+            node.width[i] = previous.width[i] - (position - positions[i]) + 1
+            previous.next[i] = node
+            previous.width[i] = position - positions[i]
+        for i in range(height, self.level):
+            update[i].width[i] += 1
+        self.size += 1
+    
+    def remove(self, key):
+        """Remove a key; False if it was not in the list"""
+        update, _ = self._predecessors(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(self.level):
+            previous = update[i]
+            if previous.next[i] is node:
+                previous.width[i] += node.width[i] - 1
+                previous.next[i] = node.next[i]
+            else:
+                previous.width[i] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.size -= 1
+        return True
+    
+    def bisect_left(self, key):
+        """Number of keys smaller than key"""
+        node = self.head
+        position = 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+        return position
+    
+    def bisect_right(self, key):
+        """Number of keys smaller than or equal to key"""
+        node = self.head
+        position = 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key <= key:
+                position += node.width[i]
+                node = node.next[i]
+        return position
+    
+    def iter_from(self, index):
+        """Keys from index onwards, in order"""
+        node = self.head
+        position = 0
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and position + node.width[i] <= index:
+                position += node.width[i]
+                node = node.next[i]
+        node = node.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+    
+    def slice(self, start, stop=None):
+        """Keys at indexes start to stop (to the end when stop is None)"""
+        count = (stop if stop is not None else self.size) - start
+        keys = []
+        if count <= 0:
+            return keys
+        for key in self.iter_from(start):
+            keys.append(key)
+            if len(keys) == count:
+                break
+        return keys
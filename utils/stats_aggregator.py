@@ -0,0 +1,116 @@
+"""
+Dashboard counters kept current from the database change stream
+Answers /api/stats from memory, with a version for ETag/Last-Modified validation
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+class StatsAggregator:
+    """Player, match and tournament counters maintained on every change
+    
+    The aggregator subscribes to the database change listeners and adjusts
+    its counters per changed record, remembering each record's status so a
+    status change moves one count. A reloaded collection (key None) is
+    recounted on the next read. snapshot() first asks the database to pick
+    up other processes' writes, which costs a stat or a pragma when nothing
+    changed.
+    
+    version only moves when the published counters change, so it can back
+    an ETag: polling clients get 304s until something they show changes.
+    """
+    
+    COLLECTIONS = ('players', 'matches', 'tournaments')
+    
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self.statuses = {collection: {} for collection in self.COLLECTIONS}
+        self.counts = {collection: Counter() for collection in self.COLLECTIONS}
+        self._stale = set(self.COLLECTIONS)
+        self._dirty = True
+        self._changes = 0
+        
+        # Unique per process so ETags never repeat across restarts
+        self.epoch = f"{os.getpid():x}{int(time.time()):x}"
+        self.version = 0
+        self.last_modified = time.time()
+        self.stats = {}
+        db.add_change_listener(self._on_change)
+    
+    def _on_change(self, collection, key, record):
+        if collection not in self.statuses:
+            return
+        with self._lock:
+            self._dirty = True
+            self._changes += 1
+            if key is None:
+                self._stale.add(collection)
+            elif collection not in self._stale:
+                self._apply(collection, key, record)
+    
+    def _apply(self, collection, key, record):
+        statuses = self.statuses[collection]
+        counts = self.counts[collection]
+        if key in statuses:
+            counts[statuses.pop(key)] -= 1
+        if record is not None:
+            status = record.get('status')
+            statuses[key] = status
+            counts[status] += 1
+    
+    def _recount(self, collection):
+        with self._lock:
+            changes = self._changes
+        records = {
+            'players': self.db.get_all_players,
+            'matches': self.db.get_all_matches,
+            'tournaments': self.db.get_all_tournaments,
+        }[collection]()
+        with self._lock:
+            if self._changes != changes:
+                # Changed while we were reading; recount on the next snapshot
+                return
+            self._stale.discard(collection)
+            self.statuses[collection] = {}
+            self.counts[collection] = Counter()
+            for key, record in records.items():
+                self._apply(collection, key, record)
+    
+    def snapshot(self):
+        """(stats, version tag, last modified epoch seconds) for the dashboard"""
+        self.db.check_for_changes()
+        # Recounts read the database outside our lock; its listeners take it.
+        # A recount overlapping a change is retried
+        for _ in range(3):
+            for collection in list(self._stale):
+                self._recount(collection)
+            if not self._stale:
+                break
+        
+        with self._lock:
+            if self._dirty:
+                self._dirty = False
+                stats = self._build()
+                if stats != self.stats:
+                    self.stats = stats
+                    self.version += 1
+                    self.last_modified = time.time()
+            return dict(self.stats), f"{self.epoch}-{self.version}", self.last_modified
+    
+    def _build(self):
+        matches = self.counts['matches']
+        tournaments = self.counts['tournaments']
+        return {
+            'total_players': len(self.statuses['players']),
+            'total_tournaments': sum(tournaments.values()),
+            'total_matches': sum(matches.values()),
+            'active_tournaments': tournaments['active'],
+            'completed_matches': matches['completed'],
+            'pending_matches': matches['pending'],
+        }
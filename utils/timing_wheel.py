@@ -0,0 +1,139 @@
+"""
+Hierarchical timing wheel for match reminders
+Second, minute and hour wheels plus per-day buckets, all keyed by whole seconds
+"""
+
+import math
+import time
+
+class TimingWheel:
+    """Hierarchical timing wheel with O(1) add, cancel and expire
+    
+    Times are epoch seconds. A job lands in the finest wheel whose range
+    covers it: the second wheel holds the next minute, the minute wheel the
+    next hour, the hour wheel the next day, and anything further waits in a
+    bucket per day. When a coarser slot comes around its jobs cascade down
+    to the finer wheels. Jobs expire on the first whole second at or after
+    their time, never early.
+    """
+    
+    # (slots, seconds per slot) from the finest wheel up
+    LEVELS = ((60, 1), (60, 60), (24, 3600))
+    DAY = 86400
+    
+    def __init__(self, now=None):
+        self.current = int(now if now is not None else time.time())
+        self.wheels = [[{} for _ in range(slots)] for slots, _ in self.LEVELS]
+        self.sizes = [0] * (len(self.LEVELS) + 1)
+        self.days = {}
+        self._where = {}
+    
+    def __len__(self):
+        return len(self._where)
+    
+    def __contains__(self, key):
+        return key in self._where
+    
+    def add(self, key, when, payload=None):
+        """Add a job, replacing any job with the same key"""
+        self.cancel(key)
+        tick = max(math.ceil(when), self.current + 1)
+        self._place(key, (tick, when, payload))
+    
+    def cancel(self, key):
+        """Remove a job; returns False if it was not scheduled"""
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        tick = slot.pop(key)[0]
+        self.sizes[level] -= 1
+        if level == len(self.LEVELS) and not slot:
+            del self.days[tick // self.DAY]
+        return True
+    
+    def clear(self):
+        for wheel in self.wheels:
+            for slot in wheel:
+                slot.clear()
+        self.days.clear()
+        self._where.clear()
+        self.sizes = [0] * len(self.sizes)
+    
+    def _place(self, key, entry):
+        tick = entry[0]
+        for level, (slots, span) in enumerate(self.LEVELS):
+            if tick // span - self.current // span < slots:
+                slot = self.wheels[level][tick // span % slots]
+                break
+        else:
+            level = len(self.LEVELS)
+            slot = self.days.setdefault(tick // self.DAY, {})
+        slot[key] = entry
+        self.sizes[level] += 1
+        self._where[key] = (level, slot)
+    
+    def _cascade(self, level, slot):
+        entries = list(slot.items())
+        slot.clear()
+        self.sizes[level] -= len(entries)
+        for key, entry in entries:
+            self._place(key, entry)
+    
+    def _skip_to(self, target):
+        """Next tick that can change anything, jumping over empty wheels"""
+        tick = self.current + 1
+        for level, (slots, span) in enumerate(self.LEVELS):
+            if self.sizes[level]:
+                return tick
+            # Nothing below the next slot of the wheel above
+            rotation = slots * span
+            tick = max(tick, -(-tick // rotation) * rotation)
+            if tick >= target:
+                return target
+        return min(tick if self.days else target, target)
+    
+    def advance(self, now=None):
+        """Move the wheel up to now and return the expired (key, when, payload) jobs"""
+        target = int(now if now is not None else time.time())
+        expired = []
+        while self.current < target:
+            tick = self._skip_to(target)
+            self.current = tick
+            
+            # Cascade from the top so jobs due this second reach the second wheel
+            if tick % self.DAY == 0 and tick // self.DAY in self.days:
+                self._cascade(len(self.LEVELS), self.days.pop(tick // self.DAY))
+            for level in range(len(self.LEVELS) - 1, 0, -1):
+                slots, span = self.LEVELS[level]
+                if tick % span == 0:
+                    self._cascade(level, self.wheels[level][tick // span % slots])
+            
+            slot = self.wheels[0][tick % self.LEVELS[0][0]]
+            if slot:
+                for key, (_, when, payload) in slot.items():
+                    del self._where[key]
+                    expired.append((key, when, payload))
+                self.sizes[0] -= len(slot)
+                slot.clear()
+        return expired
+    
+    def next_deadline(self):
+        """Epoch second of the next tick that may expire jobs, or None when empty"""
+        if not self._where:
+            return None
+        
+        candidates = []
+        slots, _ = self.LEVELS[0]
+        if self.sizes[0]:
+            for tick in range(self.current + 1, self.current + slots + 1):
+                if self.wheels[0][tick % slots]:
+                    candidates.append(tick)
+                    break
+        for level in range(1, len(self.LEVELS)):
+            if self.sizes[level]:
+                span = self.LEVELS[level][1]
+                candidates.append((self.current // span + 1) * span)
+        if self.sizes[-1]:
+            candidates.append((min(self.days) if self.days else self.current // self.DAY + 1) * self.DAY)
+        return min(candidates)
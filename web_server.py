@@ -1,30 +1,135 @@
+import base64
+import binascii
+import functools
 import json
 import os
-from flask import render_template, jsonify, request
+import threading
+from datetime import datetime
+from flask import render_template, jsonify, make_response, request, Response
 from app import app
-from database import Database
+from database import create_database
+from models import PLAYER_RANKINGS
+from utils.change_feed import ChangeFeed
+from utils.page_cache import PageCache
+from utils.stats_aggregator import StatsAggregator
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Initialize database
-db = Database()
+db = create_database()
+# Dashboard counters, kept current from the database change listeners
+live_stats = StatsAggregator(db)
+def dashboard_board():
+    """Top players and recent matches as the dashboard lists them, for the live feed"""
+    return {
+        'top_players': [
+            dict({field: player.get(field, 0) for field in ('wins', 'losses', 'kills', 'deaths')},
+                 username=player.get('username', ''))
+            for player in db.get_top_players('wins', 5)
+        ],
+        'recent_matches': [
+            {field: match.get(field) for field in ('description', 'status', 'created_at')}
+            for match in db.get_recent_matches(5)
+        ],
+    }
+
+# Server-Sent Events for the live pages, fed by one watcher thread
+live_feed = ChangeFeed(db, live_stats, board=dashboard_board)
+
+# Threads per gunicorn worker (gunicorn.conf.py). Open live streams and full
+# page renders each get a share, so /keep-alive and the JSON API always
+# find a free thread
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '32'))
+MAX_LIVE_STREAMS = int(os.environ.get('MAX_LIVE_STREAMS', max(1, WEB_THREADS // 2)))
+MAX_PAGE_RENDERS = int(os.environ.get('MAX_PAGE_RENDERS', max(1, WEB_THREADS // 4)))
+page_render_slots = threading.BoundedSemaphore(MAX_PAGE_RENDERS)
+# Rendered pages, valid until the next write to the database
+page_cache = PageCache()
+
+# Page sizes of the paginated JSON API
+API_PAGE_SIZE = 25
+API_MAX_PAGE_SIZE = 100
+
+def encode_cursor(key):
+    """Opaque cursor for a page key returned by the database"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Page key from a cursor, or ValueError if it is malformed"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def page_args():
+    """(limit, decoded cursor or None, field names or None) from the query string"""
+    limit = request.args.get('limit', API_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
+    return (limit, decode_cursor(cursor) if cursor else None,
+            [field for field in fields.split(',') if field] if fields else None)
+
+def render_slot(view):
+    """Run a page view only while fewer than MAX_PAGE_RENDERS others are rendering
+    
+    A request that waits too long gets a 503 instead of tying up another thread.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not page_render_slots.acquire(timeout=5):
+            return render_template('base.html'), 503, {'Retry-After': '5'}
+        try:
+            return view(*args, **kwargs)
+        finally:
+            page_render_slots.release()
+    return wrapper
+
+def cached_page(view):
+    """Serve a page view from page_cache while the data version is unchanged
+    
+    Pages are stored per path and query string, compressed once, and
+    revalidated by ETag. Only str results are cached, so a view returns a
+    Response for a page that must not be kept, such as an error fallback.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        version = db.data_version()
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        page = page_cache.get(key, version)
+        if page is None:
+            body = view(*args, **kwargs)
+            if not isinstance(body, str):
+                return body
+            page = page_cache.put(key, version, body)
+        
+        encoding = page.encoding_for(request.accept_encodings)
+        response = Response(page.bodies[encoding], mimetype=page.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{page.etag}-{encoding}")
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+def page_response(items, next_key, fields):
+    """JSON page with only the requested fields and the cursor of the next page"""
+    if fields:
+        items = [{field: item[field] for field in fields if field in item} for item in items]
+    return jsonify({
+        'items': items,
+        'next_cursor': encode_cursor(next_key) if next_key is not None else None
+    })
 
 @app.route('/')
 def index():
     """Home page"""
     try:
         # Get basic statistics
-        players = db.get_all_players()
-        tournaments = db.get_all_tournaments()
-        matches = db.get_all_matches()
-        
-        stats = {
-            'total_players': len(players),
-            'total_tournaments': len(tournaments),
-            'total_matches': len(matches),
-            'active_tournaments': len([t for t in tournaments.values() if t['status'] == 'active'])
-        }
+        stats, _, _ = live_stats.snapshot()
         
         return render_template('index.html', stats=stats)
         
@@ -33,37 +138,18 @@ def index():
         return render_template('index.html', stats={})
 
 @app.route('/dashboard')
+@render_slot
 def dashboard():
     """Dashboard page"""
     try:
-        # Get all data for dashboard
-        players = db.get_all_players()
-        tournaments = db.get_all_tournaments()
-        matches = db.get_all_matches()
-        
-        # Calculate statistics
-        stats = {
-            'total_players': len(players),
-            'total_tournaments': len(tournaments),
-            'total_matches': len(matches),
-            'active_tournaments': len([t for t in tournaments.values() if t['status'] == 'active']),
-            'completed_matches': len([m for m in matches.values() if m['status'] == 'completed']),
-            'pending_matches': len([m for m in matches.values() if m['status'] == 'pending'])
-        }
+        # Counters are maintained by the aggregator
+        stats, _, _ = live_stats.snapshot()
         
         # Top players by wins
-        top_players = sorted(
-            players.values(), 
-            key=lambda p: p['wins'], 
-            reverse=True
-        )[:10]
+        top_players = db.get_top_players('wins', 10)
         
         # Recent matches
-        recent_matches = sorted(
-            matches.values(),
-            key=lambda m: m['created_at'],
-            reverse=True
-        )[:10]
+        recent_matches = db.get_recent_matches(10)
         
         return render_template('dashboard.html', 
                              stats=stats, 
@@ -103,25 +189,24 @@ def bot_status():
         return render_template('bot_status.html', stats={}, activity_logs=[])
 
 @app.route('/players')
+@cached_page
+@render_slot
 def players():
     """Players page"""
     try:
-        players = db.get_all_players()
-        
-        # Sort players by wins
-        sorted_players = sorted(
-            players.values(),
-            key=lambda p: (p['wins'], p['kills'] / max(p['deaths'], 1)),
-            reverse=True
-        )
+        # Players by wins, then by kills
+        sorted_players = db.get_top_players('wins', None)
         
         return render_template('players.html', players=sorted_players)
         
     except Exception as e:
         logger.error(f"Error loading players: {e}")
-        return render_template('players.html', players=[])
+        # A Response rather than a str, so the fallback is not cached
+        return make_response(render_template('players.html', players=[]))
 
 @app.route('/matches')
+@cached_page
+@render_slot
 def matches():
     """Matches page"""
     try:
@@ -139,9 +224,11 @@ def matches():
         
     except Exception as e:
         logger.error(f"Error loading matches: {e}")
-        return render_template('matches.html', matches=[], players={})
+        return make_response(render_template('matches.html', matches=[], players={}))
 
 @app.route('/tournaments')
+@cached_page
+@render_slot
 def tournaments():
     """Tournaments page"""
     try:
@@ -158,49 +245,99 @@ def tournaments():
         
     except Exception as e:
         logger.error(f"Error loading tournaments: {e}")
-        return render_template('tournaments.html', tournaments=[])
+        return make_response(render_template('tournaments.html', tournaments=[]))
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for live statistics"""
     try:
-        players = db.get_all_players()
-        tournaments = db.get_all_tournaments()
-        matches = db.get_all_matches()
+        stats, version, last_modified = live_stats.snapshot()
         
-        stats = {
-            'total_players': len(players),
-            'total_tournaments': len(tournaments),
-            'total_matches': len(matches),
-            'active_tournaments': len([t for t in tournaments.values() if t['status'] == 'active']),
-            'completed_matches': len([m for m in matches.values() if m['status'] == 'completed']),
-            'pending_matches': len([m for m in matches.values() if m['status'] == 'pending'])
-        }
-        
-        return jsonify(stats)
+        # Pollers revalidate every time and get a 304 while nothing changed
+        response = jsonify(stats)
+        response.set_etag(version)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Error getting API stats: {e}")
         return jsonify({'error': 'Failed to get statistics'}), 500
 
+@app.route('/api/events')
+def api_events():
+    """Server-Sent Events stream of stats, match results and bracket updates"""
+    if len(live_feed.subscribers) >= MAX_LIVE_STREAMS:
+        # The page falls back to polling /api/stats
+        return jsonify({'error': 'Too many live connections'}), 503, {'Retry-After': '30'}
+    
+    return Response(
+        live_feed.stream(request.headers.get('Last-Event-ID')),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/players')
 def api_players():
-    """API endpoint for players data"""
+    """Players in leaderboard order, one page per request
+    
+    Query: sort (a ranking, default wins), limit, cursor (next_cursor of
+    the previous page) and fields (comma separated).
+    """
     try:
-        players = db.get_all_players()
-        return jsonify(list(players.values()))
+        ranking = request.args.get('sort', 'wins')
+        if ranking not in PLAYER_RANKINGS:
+            raise ValueError(f"Unknown sort: {ranking}")
+        limit, after, fields = page_args()
+        if after is not None:
+            score, user_id = after
+            after = (tuple(score), user_id)
+        
+        players, next_key = db.get_players_page(ranking, limit, after)
+        return page_response(players, next_key, fields)
         
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting API players: {e}")
         return jsonify({'error': 'Failed to get players'}), 500
 
+@app.route('/api/matches')
+def api_matches():
+    """Matches, newest first, one page per request
+    
+    Query: status, player (a user id), limit, cursor (next_cursor of the
+    previous page) and fields (comma separated).
+    """
+    try:
+        limit, before, fields = page_args()
+        if before is not None:
+            created_at, match_id = before
+            before = (str(created_at), str(match_id))
+        
+        matches, next_key = db.get_matches_page(
+            limit, before,
+            status=request.args.get('status'),
+            player_id=request.args.get('player')
+        )
+        return page_response(matches, next_key, fields)
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting API matches: {e}")
+        return jsonify({'error': 'Failed to get matches'}), 500
+
 @app.route('/keep-alive')
 def keep_alive_endpoint():
-    """Keep alive endpoint for hosting services"""
+    """Keep alive endpoint for hosting services
+    
+    Touches no data and no render slot, so it answers while pages are busy.
+    """
     return jsonify({
         'status': 'alive',
         'message': 'BombSquad Tournament Bot is running',
-        'timestamp': db.get_current_timestamp()
+        'timestamp': datetime.now().isoformat()
     })
 
 @app.errorhandler(404)